@@ -1,27 +1,57 @@
 from django.contrib import admin
 
 from articles.models import Article
+from articles.search import filter_matching
+from blog_project.admin import RecentInlineFormSet, ScalableAdminMixin
+from comments.signals import suspend_comment_counters
 
 
 class CommentInline(admin.TabularInline):
     from comments.models import Comment
     model = Comment
+    formset = RecentInlineFormSet
+    verbose_name_plural = 'recent comments'
     fields = ('author', 'text', 'created_at')
     readonly_fields = ('author', 'created_at')
     extra = 0
     show_change_link = True
 
+    def get_queryset(self, request):
+        # Comment.__str__ (the row titles) reads author and article.
+        return (
+            super().get_queryset(request)
+            .select_related('author', 'article')
+            .defer('article__content', 'article__search_vector')
+            .order_by('-created_at', '-id')
+        )
+
 
 @admin.register(Article)
-class ArticleAdmin(admin.ModelAdmin):
+class ArticleAdmin(ScalableAdminMixin, admin.ModelAdmin):
     inlines = [CommentInline]
+    # comment_count is a stored column, so listing it costs nothing per row.
     list_display = ('title', 'author', 'category', 'comment_count', 'created_at', 'updated_at')
-    list_filter = ('category', 'created_at', 'author')
-    search_fields = ('title', 'content', 'author__username')
-    readonly_fields = ('created_at', 'updated_at')
+    list_select_related = ('author', 'category')
+    # No author filter: its sidebar would list every user. Search by username instead.
+    list_filter = ('category', 'created_at')
+    search_fields = ('author__username',)
+    readonly_fields = ('comment_count', 'created_at', 'updated_at')
     raw_id_fields = ('author',)
     date_hierarchy = 'created_at'
 
-    def comment_count(self, obj):
-        return obj.comments.count()
-    comment_count.short_description = 'Comments'
+    def delete_model(self, request, obj):
+        # Cascaded comments needn't UPDATE the counter of the article being deleted.
+        with suspend_comment_counters():
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with suspend_comment_counters():
+            super().delete_queryset(request, queryset)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Title/content go through the full-text index instead of icontains scans.
+        matches = filter_matching(queryset, search_term) if search_term.strip() else None
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if matches is not None:
+            queryset = matches | queryset
+        return queryset, may_have_duplicates
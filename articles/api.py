@@ -1,12 +1,36 @@
 import logging
-from typing import List
+from datetime import datetime
+from typing import List, Literal, Optional
 
-from django.shortcuts import get_object_or_404
+from django import db
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Substr
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
 from ninja import Router
+from ninja.decorators import decorate_view
+from ninja.pagination import paginate
 
+from articles.cache import (
+    article_detail_key, article_detail_validators, article_list_key, article_list_validators,
+    invalidate_articles,
+)
 from articles.models import Article
-from articles.schemas import ArticleIn, ArticleOut, ArticleUpdate
-from users.auth import TokenAuth
+from articles.schemas import ArticleBulkUpdate, ArticleIn, ArticleListOut, ArticleOut, ArticleSearchOut, ArticleUpdate
+from articles.search import rank_matching
+from blog_project.bulk import BulkDeleteIn, BulkResultOut, too_many
+from blog_project.db_router import read_from_replica
+from blog_project.export import NDJSON_DOCS, ndjson_response, updated_between
+from blog_project.pagination import CursorPagination
+from blog_project.renderers import skip_response_validation
+from blog_project.response_cache import cached_response
+from categories.cache import invalidate_categories
+from categories.models import Category
+from comments.signals import suspend_comment_counters
+from users.auth import AsyncTokenAuth, TokenAuth
 from users.schemas import ErrorOut
 
 logger = logging.getLogger('articles')
@@ -14,50 +38,241 @@ logger = logging.getLogger('articles')
 router = Router(tags=['articles'])
 
 
-@router.get('/', response=List[ArticleOut])
-def list_articles(request):
-    return Article.objects.select_related('author').all()
+LIST_FIELDS = ('id', 'title', 'author_id', 'category_id', 'comment_count', 'created_at', 'updated_at')
 
 
-@router.get('/{article_id}', response=ArticleOut)
-def get_article(request, article_id: int):
-    return get_object_or_404(Article.objects.select_related('author'), id=article_id)
+@router.get('/', response=List[ArticleListOut], exclude_unset=True)
+@skip_response_validation
+@decorate_view(read_from_replica)
+@decorate_view(cached_response(article_list_key, article_list_validators))
+@paginate(CursorPagination)
+async def list_articles(
+    request,
+    view: Literal['summary', 'full'] = 'summary',
+    excerpt: bool = False,
+    category: Optional[int] = None,
+    category_slug: Optional[str] = None,
+):
+    fields = LIST_FIELDS + ('content',) if view == 'full' else LIST_FIELDS
+    expressions = {'author_username': F('author__username')}
+    if excerpt:
+        expressions['excerpt'] = Substr('content', 1, settings.API_EXCERPT_LENGTH)
+    articles = Article.objects.all()
+    # Both filters walk article_category_created_idx in cursor order.
+    if category is not None:
+        articles = articles.filter(category_id=category)
+    if category_slug is not None:
+        articles = articles.filter(category__slug=category_slug)
+    return articles.values(*fields, **expressions)
+
+
+@router.get('/search', response=List[ArticleSearchOut], exclude_unset=True)
+@skip_response_validation
+async def search_articles(request, q: str, limit: int = settings.API_PAGE_SIZE, excerpt: bool = False):
+    q = q.strip()
+    if not q:
+        return []
+    limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+    expressions = {'author_username': F('author__username')}
+    if excerpt:
+        expressions['excerpt'] = Substr('content', 1, settings.API_EXCERPT_LENGTH)
+    matches = rank_matching(Article.objects.all(), q)
+    return [row async for row in matches.values(*LIST_FIELDS, 'rank', **expressions)[:limit]]
+
+
+EXPORT_FIELDS = LIST_FIELDS + ('content',)
+
+
+@router.get('/export', response={403: ErrorOut}, auth=AsyncTokenAuth(), openapi_extra=NDJSON_DOCS)
+@decorate_view(read_from_replica)
+async def export_articles(
+    request, updated_after: Optional[datetime] = None, updated_before: Optional[datetime] = None,
+):
+    if not request.auth.is_staff:
+        return 403, {'detail': 'Only staff can export'}
+    articles = Article.objects.values(*EXPORT_FIELDS, author_username=F('author__username'))
+    # Pick the database now: the body streams after the routing middleware has returned.
+    articles = updated_between(articles, updated_after, updated_before).using(db.router.db_for_read(Article))
+    logger.info(
+        "Articles export started by user '%s'", request.auth.username,
+        extra={'event': 'articles_exported', 'user_id': request.auth.id},
+    )
+    return ndjson_response(request, articles, 'articles.ndjson')
+
+
+@router.get('/{int:article_id}', response=ArticleOut)
+@decorate_view(read_from_replica)
+@decorate_view(cached_response(article_detail_key, article_detail_validators))
+async def get_article(request, article_id: int):
+    return await aget_object_or_404(Article.objects.select_related('author'), id=article_id)
 
 
 @router.post('/', response={201: ArticleOut}, auth=TokenAuth())
 def create_article(request, payload: ArticleIn):
     article = Article.objects.create(author=request.auth, **payload.dict())
-    logger.info("Article '%s' created by user '%s'", article.title, request.auth.username)
+    logger.info(
+        "Article '%s' created by user '%s'", article.title, request.auth.username,
+        extra={'event': 'article_created', 'user_id': request.auth.id, 'article_id': article.id},
+    )
     return 201, article
 
 
-@router.put('/{article_id}', response={200: ArticleOut, 403: ErrorOut}, auth=TokenAuth())
+def _unknown_categories(items):
+    category_ids = {item.category_id for item in items if item.category_id is not None}
+    if not category_ids:
+        return set()
+    return category_ids - set(Category.objects.filter(id__in=category_ids).values_list('id', flat=True))
+
+
+@router.post('/bulk', response={200: List[BulkResultOut], 400: ErrorOut}, auth=TokenAuth())
+def bulk_create_articles(request, payload: List[ArticleIn]):
+    error = too_many(payload)
+    if error:
+        return error
+
+    unknown = _unknown_categories(payload)
+    results, articles = [], []
+    for item in payload:
+        if item.category_id in unknown:
+            results.append({'status': 400, 'detail': 'Unknown category'})
+        else:
+            article = Article(author=request.auth, **item.dict())
+            articles.append(article)
+            results.append(article)
+
+    with transaction.atomic():
+        Article.objects.bulk_create(articles)
+    invalidate_articles(*(article.id for article in articles))
+    invalidate_categories()
+    logger.info(
+        "%d articles bulk-created by user '%s'", len(articles), request.auth.username,
+        extra={'event': 'articles_bulk_created', 'user_id': request.auth.id, 'count': len(articles)},
+    )
+    return 200, [
+        {'id': r.id, 'status': 201} if isinstance(r, Article) else r
+        for r in results
+    ]
+
+
+@router.patch('/bulk', response={200: List[BulkResultOut], 400: ErrorOut}, auth=TokenAuth())
+def bulk_update_articles(request, payload: List[ArticleBulkUpdate]):
+    error = too_many(payload)
+    if error:
+        return error
+
+    unknown = _unknown_categories(payload)
+    existing = Article.objects.only('id', 'author').in_bulk([item.id for item in payload])
+    now = timezone.now()
+    # Rows are grouped by the fields they set: bulk_update() writes every listed
+    # field, which would lazy-load the deferred ones and overwrite unsent columns.
+    results, changed, groups = [], {}, {}
+    for item in payload:
+        article = existing.get(item.id)
+        if article is None:
+            results.append({'id': item.id, 'status': 404, 'detail': 'Not found'})
+        elif article.author_id != request.auth.id:
+            results.append({'id': item.id, 'status': 403, 'detail': 'You can only edit your own articles'})
+        elif item.category_id in unknown:
+            results.append({'id': item.id, 'status': 400, 'detail': 'Unknown category'})
+        else:
+            values = item.dict(exclude_unset=True, exclude={'id'})
+            results.append({'id': item.id, 'status': 200})
+            if not values:
+                continue
+            for attr, value in values.items():
+                setattr(article, attr, value)
+            article.updated_at = now
+            groups.setdefault((*sorted(values), 'updated_at'), []).append(article)
+            changed[article.id] = article
+
+    with transaction.atomic():
+        for fields, articles in groups.items():
+            Article.objects.bulk_update(articles, fields)
+    invalidate_articles(*changed)
+    if any('category_id' in fields for fields in groups):
+        invalidate_categories()
+    logger.info(
+        "%d articles bulk-updated by user '%s'", len(changed), request.auth.username,
+        extra={'event': 'articles_bulk_updated', 'user_id': request.auth.id, 'count': len(changed)},
+    )
+    return 200, results
+
+
+@router.delete('/bulk', response={200: List[BulkResultOut], 400: ErrorOut}, auth=TokenAuth())
+def bulk_delete_articles(request, payload: BulkDeleteIn):
+    error = too_many(payload.ids)
+    if error:
+        return error
+
+    owners = dict(Article.objects.filter(id__in=payload.ids).values_list('id', 'author_id'))
+    results, owned = [], []
+    for article_id in payload.ids:
+        if article_id not in owners:
+            results.append({'id': article_id, 'status': 404, 'detail': 'Not found'})
+        elif owners[article_id] != request.auth.id:
+            results.append({'id': article_id, 'status': 403, 'detail': 'You can only delete your own articles'})
+        else:
+            owned.append(article_id)
+            results.append({'id': article_id, 'status': 204})
+
+    # The articles are going away, so cascaded comments needn't touch their counters.
+    with transaction.atomic(), suspend_comment_counters():
+        Article.objects.filter(id__in=owned).only('id').delete()
+    logger.info(
+        "%d articles bulk-deleted by user '%s'", len(owned), request.auth.username,
+        extra={'event': 'articles_bulk_deleted', 'user_id': request.auth.id, 'count': len(owned)},
+    )
+    return 200, results
+
+
+def _owner_username(article_id):
+    """Called only after an owner-filtered write matched nothing: 404 if missing, else the owner."""
+    owner = Article.objects.filter(id=article_id).values_list('author__username', flat=True).first()
+    if owner is None:
+        raise Http404
+    return owner
+
+
+@router.put('/{int:article_id}', response={200: ArticleOut, 403: ErrorOut}, auth=TokenAuth())
 def update_article(request, article_id: int, payload: ArticleUpdate):
-    article = get_object_or_404(Article, id=article_id)
-    if article.author != request.auth:
+    values = payload.dict(exclude_unset=True)
+    updated = Article.objects.filter(id=article_id, author_id=request.auth.id).update(
+        updated_at=timezone.now(), **values,
+    )
+    if not updated:
         logger.warning(
             "User '%s' tried to update article %d owned by '%s'",
-            request.auth.username, article_id, article.author.username,
+            request.auth.username, article_id, _owner_username(article_id),
+            extra={'event': 'article_update_denied', 'user_id': request.auth.id, 'article_id': article_id},
         )
         return 403, {'detail': 'You can only edit your own articles'}
 
-    for attr, value in payload.dict(exclude_unset=True).items():
-        setattr(article, attr, value)
-    article.save()
-    logger.info("Article %d updated by user '%s'", article_id, request.auth.username)
-    return 200, article
+    # A queryset update sends no post_save, so evict cached reads here.
+    invalidate_articles(article_id)
+    if 'category_id' in values:
+        invalidate_categories()
+    logger.info(
+        "Article %d updated by user '%s'", article_id, request.auth.username,
+        extra={'event': 'article_updated', 'user_id': request.auth.id, 'article_id': article_id},
+    )
+    return 200, Article.objects.select_related('author').get(id=article_id)
 
 
-@router.delete('/{article_id}', response={204: None, 403: ErrorOut}, auth=TokenAuth())
+@router.delete('/{int:article_id}', response={204: None, 403: ErrorOut}, auth=TokenAuth())
 def delete_article(request, article_id: int):
-    article = get_object_or_404(Article, id=article_id)
-    if article.author != request.auth:
+    # only('id'): the delete signals need just the pk, not the article body.
+    with suspend_comment_counters():
+        deleted, _ = Article.objects.filter(id=article_id, author_id=request.auth.id).only('id').delete()
+    if not deleted:
         logger.warning(
             "User '%s' tried to delete article %d owned by '%s'",
-            request.auth.username, article_id, article.author.username,
+            request.auth.username, article_id, _owner_username(article_id),
+            extra={'event': 'article_delete_denied', 'user_id': request.auth.id, 'article_id': article_id},
         )
         return 403, {'detail': 'You can only delete your own articles'}
 
-    article.delete()
-    logger.info("Article %d deleted by user '%s'", article_id, request.auth.username)
+    logger.info(
+        "Article %d deleted by user '%s'", article_id, request.auth.username,
+        extra={'event': 'article_deleted', 'user_id': request.auth.id, 'article_id': article_id},
+    )
     return 204, None
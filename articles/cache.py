@@ -0,0 +1,37 @@
+from articles.models import Article
+from blog_project.response_cache import (
+    bump_generation, generation, invalidate, make_etag, query_fingerprint,
+)
+
+
+def article_detail_key(request, article_id):
+    return f'api:article:{article_id}'
+
+
+async def article_list_key(request):
+    return f"api:articles:{await generation('articles')}:{query_fingerprint(request)}"
+
+
+async def article_detail_validators(request, article_id):
+    row = await (
+        Article.objects.filter(id=article_id)
+        .values_list('updated_at', 'comment_count', 'author__username')
+        .afirst()
+    )
+    if row is None:
+        return None
+    # comment_count and the author's name change without touching updated_at, so only the ETag sees them.
+    updated_at, comment_count, username = row
+    return make_etag('article', article_id, updated_at.isoformat(), comment_count, username), updated_at.timestamp()
+
+
+async def article_list_validators(request):
+    # Every write that can change a list page (articles, comment counts, categories) bumps
+    # 'articles' and renames bump 'usernames', so no table aggregate is needed.
+    etag = make_etag('articles', await generation('articles'), await generation('usernames'), query_fingerprint(request))
+    return etag, None
+
+
+def invalidate_articles(*article_ids):
+    invalidate(*(article_detail_key(None, article_id) for article_id in article_ids))
+    bump_generation('articles')
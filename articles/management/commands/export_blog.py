@@ -0,0 +1,55 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+
+from articles.api import EXPORT_FIELDS
+from articles.models import Article
+from blog_project.export import stream_ndjson, updated_between
+from comments.api import LIST_FIELDS as COMMENT_FIELDS
+from comments.models import Comment
+
+EXPORTS = {
+    'articles': lambda: Article.objects.values(*EXPORT_FIELDS, author_username=F('author__username')),
+    'comments': lambda: Comment.objects.values(*COMMENT_FIELDS, author_username=F('author__username')),
+}
+
+
+def _datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise CommandError(f'Not an ISO 8601 datetime: {value}')
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Write articles or comments as NDJSON (one JSON object per line), the same rows as '
+        '/api/articles/export and /api/comments/export. Streams with constant memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(EXPORTS))
+        parser.add_argument('--output', '-o', help='File to write; default stdout. A .gz name implies --gzip.')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--updated-after', type=_datetime, help='Only rows with updated_at >= this.')
+        parser.add_argument('--updated-before', type=_datetime, help='Only rows with updated_at < this.')
+        parser.add_argument('--chunk-size', type=int, help='Rows per database fetch (default EXPORT_CHUNK_SIZE).')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compress = options['gzip'] or bool(output and output.endswith('.gz'))
+        rows = updated_between(EXPORTS[options['table']](), options['updated_after'], options['updated_before'])
+        chunks = stream_ndjson(rows.using(options['database']), compress, options['chunk_size'])
+
+        stream = open(output, 'wb') if output else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+        finally:
+            if output:
+                stream.close()
+            else:
+                stream.flush()
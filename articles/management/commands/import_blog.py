@@ -0,0 +1,406 @@
+import abc
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from articles.cache import invalidate_articles
+from articles.models import Article
+from blog_project.response_cache import bump_generation
+from categories.cache import invalidate_categories
+from categories.models import Category
+from comments.models import Comment
+from users.passwords import make_passwords
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_rows(path, fmt):
+    """Yield dicts from an NDJSON or CSV file (``-`` for stdin); ``.gz`` files are decompressed as read."""
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    try:
+        binary = gzip.open(stream) if path.endswith('.gz') else stream
+        if fmt == 'csv':
+            yield from csv.DictReader(io.TextIOWrapper(binary, encoding='utf-8', newline=''))
+        else:
+            for line in binary:
+                if line.strip():
+                    yield _json_row(line)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def _json_row(line):
+    # Bad lines become row errors in place, so the rest of the batch still loads.
+    try:
+        row = json.loads(line)
+    except ValueError as exc:
+        return RowError(f'invalid JSON: {exc}')
+    if not isinstance(row, dict):
+        return RowError('not a JSON object')
+    return row
+
+
+def _value(row, key):
+    # CSV has no null: treat empty cells as missing.
+    value = row.get(key)
+    return None if value == '' else value
+
+
+def _required(row, key):
+    value = _value(row, key)
+    if value is None:
+        raise RowError(f'missing {key}')
+    return value
+
+
+def _sized(model, key, value):
+    # SQLite ignores max_length, so check here rather than let PostgreSQL abort the batch.
+    max_length = model._meta.get_field(key).max_length
+    if isinstance(value, str) and max_length and len(value) > max_length:
+        raise RowError(f'{key} is longer than {max_length} characters')
+    return value
+
+
+def _int(row, key):
+    value = _value(row, key)
+    try:
+        return None if value is None else int(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{key} is not an integer: {value!r}')
+
+
+def _ids(rows, key):
+    ids = set()
+    for _, row in rows:
+        try:
+            ids.add(_int(row, key))
+        except RowError:
+            pass
+    ids.discard(None)
+    return ids
+
+
+def _bool(row, key, default=False):
+    value = _value(row, key)
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 't')
+    return bool(value)
+
+
+def _datetime(row, key, default=None):
+    value = _value(row, key)
+    if value is None:
+        return default
+    try:
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:  # well-formed but not a real date, e.g. month 13
+        parsed = None
+    if parsed is None:
+        raise RowError(f'{key} is not an ISO 8601 datetime: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """Let bulk_create keep imported created_at/updated_at instead of auto_now(_add) overwriting them."""
+    fields = [f for f in model._meta.concrete_fields if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def copy_objects(connection, model, objs):
+    """INSERT ``objs`` with PostgreSQL ``COPY ... FROM STDIN`` (psycopg 3); triggers still fire."""
+    groups = defaultdict(list)
+    for obj in objs:
+        groups[obj.pk is None].append(obj)
+    with connection.cursor() as cursor:
+        for without_pk, group in groups.items():
+            fields = [f for f in model._meta.concrete_fields if not (without_pk and f.primary_key)]
+            columns = ', '.join(connection.ops.quote_name(f.column) for f in fields)
+            table = connection.ops.quote_name(model._meta.db_table)
+            with cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                for obj in group:
+                    copy.write_row([f.get_db_prep_save(getattr(obj, f.attname), connection) for f in fields])
+
+
+class Importer(abc.ABC):
+    model = None
+
+    def __init__(self, database):
+        self.database = database
+        self.explicit_ids = False
+
+    def build(self, rows):
+        """Turn a batch of rows into unsaved instances; returns ``(objs, [(row number, error), ...])``."""
+        errors = [(number, str(row)) for number, row in rows if isinstance(row, RowError)]
+        rows = [(number, row) for number, row in rows if not isinstance(row, RowError)]
+        self.prefetch(rows)
+        objs = []
+        for number, row in rows:
+            try:
+                obj = self.build_one(row)
+            except RowError as exc:
+                errors.append((number, str(exc)))
+            else:
+                objs.append(obj)
+                if obj.pk is not None:
+                    self.taken_ids.add(obj.pk)
+                    self.explicit_ids = True
+        return objs, sorted(errors)
+
+    def prefetch(self, rows):
+        # Explicit ids are checked per batch rather than held in memory.
+        ids = _ids(rows, 'id')
+        self.taken_ids = set(self.model.objects.using(self.database).filter(pk__in=ids).values_list('pk', flat=True))
+
+    def new_id(self, row):
+        pk = _int(row, 'id')
+        if pk in self.taken_ids:
+            raise RowError(f'id {pk} already exists')
+        return pk
+
+    @abc.abstractmethod
+    def build_one(self, row):
+        """Return an unsaved instance for ``row`` or raise ``RowError``."""
+
+    def inserted(self, objs):
+        pass
+
+    def finished(self):
+        pass
+
+
+class UserImporter(Importer):
+    """``username`` plus optional email, names, flags and date_joined.
+
+    ``password`` must be an encoded Django hash (any configured hasher; it is
+    upgraded on the user's next login) and is stored as is. ``raw_password``
+    is hashed, in parallel on the password pool. With neither, the account
+    gets an unusable password.
+    """
+
+    model = User
+
+    def __init__(self, database):
+        super().__init__(database)
+        self.usernames = set(User.objects.using(database).values_list('username', flat=True))
+
+    def build(self, rows):
+        objs, errors = super().build(rows)
+        plain = [obj for obj in objs if obj._raw_password is not None]
+        for obj, encoded in zip(plain, make_passwords([obj._raw_password for obj in plain])):
+            obj.password = encoded
+        return objs, errors
+
+    def build_one(self, row):
+        username = _sized(User, 'username', User.normalize_username(_required(row, 'username')))
+        if username in self.usernames:
+            raise RowError(f'username {username!r} already exists')
+        encoded, raw = _value(row, 'password'), _value(row, 'raw_password')
+        if encoded is not None:
+            try:
+                identify_hasher(encoded)
+            except ValueError:
+                raise RowError('password is not an encoded hash of a configured hasher')
+        elif raw is None:
+            encoded = make_password(None)
+        user = User(
+            id=self.new_id(row),
+            username=username,
+            email=_sized(User, 'email', _value(row, 'email') or ''),
+            first_name=_sized(User, 'first_name', _value(row, 'first_name') or ''),
+            last_name=_sized(User, 'last_name', _value(row, 'last_name') or ''),
+            is_staff=_bool(row, 'is_staff'),
+            is_superuser=_bool(row, 'is_superuser'),
+            is_active=_bool(row, 'is_active', default=True),
+            date_joined=_datetime(row, 'date_joined', timezone.now()),
+            password=encoded,
+        )
+        user._raw_password = raw if encoded is None else None
+        self.usernames.add(username)
+        return user
+
+
+class AuthorMixin:
+    def load_authors(self):
+        self.authors = dict(User.objects.using(self.database).values_list('username', 'id'))
+
+    def author_id(self, row):
+        username = _required(row, 'author_username')
+        try:
+            return self.authors[username]
+        except KeyError:
+            raise RowError(f'unknown author {username!r}')
+
+
+class ArticleImporter(AuthorMixin, Importer):
+    """``title``, ``content``, ``author_username`` and optionally ``id``,
+    ``category_slug`` or ``category_id``, ``created_at`` and ``updated_at``.
+    comment_count starts at 0 and follows the comments imported afterwards.
+    """
+
+    model = Article
+
+    def __init__(self, database):
+        super().__init__(database)
+        self.load_authors()
+        self.categories = dict(Category.objects.using(database).values_list('slug', 'id'))
+        self.category_ids = set(self.categories.values())
+
+    def category_id(self, row):
+        slug, category_id = _value(row, 'category_slug'), _int(row, 'category_id')
+        if slug is not None:
+            if slug not in self.categories:
+                raise RowError(f'unknown category {slug!r}')
+            return self.categories[slug]
+        if category_id is not None and category_id not in self.category_ids:
+            raise RowError(f'unknown category id {category_id}')
+        return category_id
+
+    def build_one(self, row):
+        created_at = _datetime(row, 'created_at', timezone.now())
+        return Article(
+            id=self.new_id(row),
+            title=_sized(Article, 'title', _required(row, 'title')),
+            content=_required(row, 'content'),
+            author_id=self.author_id(row),
+            category_id=self.category_id(row),
+            created_at=created_at,
+            updated_at=_datetime(row, 'updated_at', created_at),
+        )
+
+    def finished(self):
+        bump_generation('articles')
+        invalidate_categories()
+
+
+class CommentImporter(AuthorMixin, Importer):
+    """``text``, ``author_username``, ``article_id`` and optionally ``id``, ``created_at`` and ``updated_at``."""
+
+    model = Comment
+
+    def __init__(self, database):
+        super().__init__(database)
+        self.load_authors()
+
+    def prefetch(self, rows):
+        super().prefetch(rows)
+        ids = _ids(rows, 'article_id')
+        self.article_ids = set(Article.objects.using(self.database).filter(id__in=ids).values_list('id', flat=True))
+
+    def build_one(self, row):
+        article_id = _int(row, 'article_id')
+        if article_id not in self.article_ids:
+            raise RowError(f'unknown article {article_id}')
+        created_at = _datetime(row, 'created_at', timezone.now())
+        return Comment(
+            id=self.new_id(row),
+            text=_required(row, 'text'),
+            author_id=self.author_id(row),
+            article_id=article_id,
+            created_at=created_at,
+            updated_at=_datetime(row, 'updated_at', created_at),
+        )
+
+    def inserted(self, objs):
+        # bulk_create/COPY send no signals: keep comment_count and the caches right per batch.
+        by_delta = defaultdict(list)
+        for article_id, count in Counter(obj.article_id for obj in objs).items():
+            by_delta[count].append(article_id)
+        articles = Article.objects.using(self.database)
+        for delta, article_ids in by_delta.items():
+            articles.filter(id__in=article_ids).update(comment_count=F('comment_count') + delta)
+        touched = [article_id for article_ids in by_delta.values() for article_id in article_ids]
+        invalidate_articles(*touched)
+        bump_generation(*(f'comments:{article_id}' for article_id in touched))
+
+
+IMPORTERS = {'users': UserImporter, 'articles': ArticleImporter, 'comments': CommentImporter}
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-load users, articles or comments from NDJSON or CSV (optionally .gz; "-" reads stdin). '
+        'Rows go in with bulk_create, or COPY on PostgreSQL with --copy; authors and categories are '
+        'resolved through in-memory maps. Rows that fail validation are skipped and reported. '
+        'Import users first, then articles, then comments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(IMPORTERS))
+        parser.add_argument('path', help='Input file, or - for stdin.')
+        parser.add_argument('--format', choices=('ndjson', 'csv'),
+                            help='Default: csv for *.csv / *.csv.gz, otherwise ndjson.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--copy', action='store_true', help='Use COPY FROM STDIN (PostgreSQL, psycopg 3).')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        path, database, batch_size = options['path'], options['database'], options['batch_size']
+        fmt = options['format'] or ('csv' if path.removesuffix('.gz').endswith('.csv') else 'ndjson')
+        connection = connections[database]
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy needs PostgreSQL')
+
+        importer = IMPORTERS[options['table']](database)
+        model = importer.model
+        rows = enumerate(read_rows(path, fmt), start=1)
+        imported, skipped = 0, 0
+        started = time.perf_counter()
+        with explicit_timestamps(model):
+            while batch := list(islice(rows, batch_size)):
+                objs, errors = importer.build(batch)
+                with transaction.atomic(using=database):
+                    if options['copy']:
+                        copy_objects(connection, model, objs)
+                    else:
+                        model.objects.using(database).bulk_create(objs)
+                    importer.inserted(objs)
+                imported += len(objs)
+                skipped += len(errors)
+                for number, error in errors:
+                    self.stderr.write(f'row {number}: {error}')
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f'{imported} rows, {imported / (time.perf_counter() - started):.0f} rows/s')
+
+        if importer.explicit_ids:
+            # Rows that brought their own ids leave the PostgreSQL sequence behind.
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                    cursor.execute(sql)
+        importer.finished()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{options["table"]}: imported {imported} rows in {elapsed:.2f}s '
+            f'({imported / elapsed if elapsed else 0:.0f} rows/s), skipped {skipped}'
+        )
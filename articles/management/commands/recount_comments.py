@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from articles.cache import invalidate_articles
+from articles.models import Article
+from comments.models import Comment
+
+
+class Command(BaseCommand):
+    help = 'Recompute Article.comment_count from the comments table and fix any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        counts = (
+            Comment.objects.filter(article=OuterRef('pk'))
+            .order_by()
+            .values('article')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        actual = Coalesce(Subquery(counts), 0)
+
+        fixed = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Article.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            with transaction.atomic():
+                drifted = list(
+                    Article.objects.filter(id__in=ids)
+                    .annotate(actual=actual)
+                    .exclude(comment_count=F('actual'))
+                    .values_list('id', flat=True)
+                )
+                if drifted:
+                    Article.objects.filter(id__in=drifted).update(comment_count=actual)
+            if drifted:
+                invalidate_articles(*drifted)
+                fixed += len(drifted)
+
+        self.stdout.write(self.style.SUCCESS(f'Fixed comment_count on {fixed} article(s).'))
@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_count(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    Comment = apps.get_model('comments', 'Comment')
+    counts = (
+        Comment.objects.filter(article=OuterRef('pk'))
+        .order_by()
+        .values('article')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Article.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_article_comment_count'),
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_comment_count, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -17,8 +18,32 @@ class Article(models.Model):
         blank=True,
         related_name='articles',
     )
+    # Maintained by comments.signals; repair with `manage.py recount_comments`.
+    comment_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Filled by a database trigger on PostgreSQL (see migration 0007); unused on SQLite,
+    # which indexes title/content in the articles_article_fts FTS5 table instead.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='article_created_id_idx'),
+            models.Index(fields=['updated_at'], name='article_updated_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='article_category_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Never write back a comment_count or search_vector read earlier; signal
+        # handlers and the database trigger own them.
+        # Deferred fields are left out too, or saving would load each of them first.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in ('comment_count', 'search_vector') and f.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -17,6 +17,7 @@ class ArticleOut(Schema):
     author_id: int
     author_username: str
     category_id: Optional[int] = None
+    comment_count: int
     created_at: datetime
     updated_at: datetime
 
@@ -25,7 +26,28 @@ class ArticleOut(Schema):
         return obj.author.username
 
 
+class ArticleListOut(Schema):
+    id: int
+    title: str
+    content: Optional[str] = None
+    excerpt: Optional[str] = None
+    author_id: int
+    author_username: str
+    category_id: Optional[int] = None
+    comment_count: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class ArticleSearchOut(ArticleListOut):
+    rank: float
+
+
 class ArticleUpdate(Schema):
     title: Optional[str] = None
     content: Optional[str] = None
     category_id: Optional[int] = None
+
+
+class ArticleBulkUpdate(ArticleUpdate):
+    id: int
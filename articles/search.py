@@ -0,0 +1,44 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SQLITE_RANK_SQL = (
+    'SELECT bm25(articles_article_fts, 10.0, 1.0) FROM articles_article_fts '
+    'WHERE articles_article_fts MATCH %s AND articles_article_fts.rowid = articles_article.id'
+)
+SQLITE_MATCH_SQL = 'SELECT rowid FROM articles_article_fts WHERE articles_article_fts MATCH %s'
+
+
+def _fts5_query(q):
+    # Quote every term so user input can't trip FTS5's query syntax; terms are ANDed.
+    return ' '.join('"%s"' % term.replace('"', '""') for term in q.split())
+
+
+def filter_matching(queryset, q):
+    """Restrict ``queryset`` to articles whose title or content match ``q``, using the text index."""
+    if not q.split():
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return queryset.filter(search_vector=SearchQuery(q, config='english', search_type='websearch'))
+    if connection.vendor == 'sqlite':
+        return queryset.filter(id__in=RawSQL(SQLITE_MATCH_SQL, [_fts5_query(q)]))
+    return queryset.filter(Q(title__icontains=q) | Q(content__icontains=q))
+
+
+def rank_matching(queryset, q):
+    """Like ``filter_matching`` but annotated with ``rank`` (higher is better) and ordered by it."""
+    if not q.split():
+        queryset = queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+    elif connection.vendor == 'postgresql':
+        query = SearchQuery(q, config='english', search_type='websearch')
+        queryset = queryset.filter(search_vector=query).annotate(rank=SearchRank(F('search_vector'), query))
+    elif connection.vendor == 'sqlite':
+        # bm25() is lower-is-better, so flip its sign.
+        match = _fts5_query(q)
+        queryset = filter_matching(queryset, q).annotate(
+            rank=RawSQL(f'-({SQLITE_RANK_SQL})', [match], output_field=FloatField())
+        )
+    else:
+        queryset = filter_matching(queryset, q).annotate(rank=Value(0.0, output_field=FloatField()))
+    return queryset.order_by('-rank', '-id')
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from articles.cache import invalidate_articles
+from articles.models import Article
+from blog_project.response_cache import bump_generation
+from categories.cache import invalidate_categories
+from categories.models import Category
+from users.signals import username_changed
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def evict_article(sender, instance, **kwargs):
+    invalidate_articles(instance.pk)
+    invalidate_categories()
+
+
+@receiver(post_save, sender=Category)
+def evict_category_listing(sender, instance, created, **kwargs):
+    # Lists filtered by category_slug are cached under the articles generation.
+    if not created:
+        bump_generation('articles')
+
+
+@receiver(pre_delete, sender=Category)
+def evict_category_articles(sender, instance, **kwargs):
+    # on_delete=SET_NULL rewrites these rows with a bulk UPDATE, which sends no Article signals.
+    invalidate_articles(*instance.articles.values_list('id', flat=True))
+
+
+@receiver(username_changed)
+def evict_author_articles(sender, instance, **kwargs):
+    # Detail and list responses embed author_username.
+    invalidate_articles(*instance.articles.values_list('id', flat=True))
@@ -1,9 +1,27 @@
+import gzip
 import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth.models import User
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from ninja.responses import NinjaJSONEncoder
 
+from articles.api import list_articles
 from articles.models import Article
+from articles.search import filter_matching, rank_matching
+from categories.models import Category
+from comments.models import Comment
+from users.auth import TokenAuth
 from users.models import AuthToken
 
 
@@ -16,13 +34,57 @@ class ArticleListTests(TestCase):
     def test_list_articles(self):
         response = self.client.get('/api/articles/')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(len(response.json()['items']), 1)
+        self.assertIsNone(response.json()['next_cursor'])
+
+    def test_list_articles_summary_omits_content(self):
+        item = self.client.get('/api/articles/').json()['items'][0]
+        self.assertEqual(item['author_username'], 'testuser')
+        self.assertNotIn('content', item)
+        self.assertNotIn('excerpt', item)
+
+    def test_list_articles_full_view(self):
+        item = self.client.get('/api/articles/?view=full').json()['items'][0]
+        self.assertEqual(item['content'], 'Body')
+
+    def test_list_articles_excerpt(self):
+        Article.objects.update(content='x' * 500)
+        with self.settings(API_EXCERPT_LENGTH=10):
+            item = self.client.get('/api/articles/?excerpt=true').json()['items'][0]
+        self.assertEqual(item['excerpt'], 'x' * 10)
+        self.assertNotIn('content', item)
 
     def test_list_articles_empty(self):
         Article.objects.all().delete()
         response = self.client.get('/api/articles/')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 0)
+        self.assertEqual(len(response.json()['items']), 0)
+
+
+class ArticlePaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        for i in range(5):
+            Article.objects.create(title=f'Art {i}', content='Body', author=self.user)
+
+    def test_cursor_walks_all_pages(self):
+        titles = []
+        url = '/api/articles/?limit=2'
+        while url:
+            data = self.client.get(url).json()
+            titles += [item['title'] for item in data['items']]
+            url = f"/api/articles/?limit=2&cursor={data['next_cursor']}" if data['next_cursor'] else None
+        self.assertEqual(titles, [f'Art {i}' for i in reversed(range(5))])
+
+    def test_limit_is_capped(self):
+        with self.settings(API_MAX_PAGE_SIZE=3):
+            response = self.client.get('/api/articles/?limit=1000')
+        self.assertEqual(len(response.json()['items']), 3)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/articles/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
 
 
 class ArticleDetailTests(TestCase):
@@ -118,3 +180,556 @@ class ArticleDeleteTests(TestCase):
             HTTP_AUTHORIZATION=f'Bearer {self.other_token.key}',
         )
         self.assertEqual(response.status_code, 403)
+
+
+class ArticleCacheTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.article = Article.objects.create(title='Cached', content='Body', author=self.user)
+
+    def test_repeat_read_served_from_cache(self):
+        self.client.get(f'/api/articles/{self.article.id}')
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/articles/{self.article.id}')
+        self.assertEqual(response.json()['title'], 'Cached')
+
+    def test_update_invalidates_detail_and_list(self):
+        self.client.get(f'/api/articles/{self.article.id}')
+        self.client.get('/api/articles/')
+        self.client.put(
+            f'/api/articles/{self.article.id}',
+            data=json.dumps({'title': 'Fresh'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+        self.assertEqual(self.client.get(f'/api/articles/{self.article.id}').json()['title'], 'Fresh')
+        self.assertEqual(self.client.get('/api/articles/').json()['items'][0]['title'], 'Fresh')
+
+    def test_admin_save_invalidates_detail(self):
+        self.client.get(f'/api/articles/{self.article.id}')
+        self.article.title = 'Edited in admin'
+        self.article.save()
+        self.assertEqual(self.client.get(f'/api/articles/{self.article.id}').json()['title'], 'Edited in admin')
+
+    def test_etag_not_modified(self):
+        etag = self.client.get(f'/api/articles/{self.article.id}')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/articles/{self.article.id}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class ArticleConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.article = Article.objects.create(title='Test', content='Body', author=self.user)
+
+    def test_plain_get_skips_validators(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/articles/{self.article.id}')
+        self.assertNotIn('Last-Modified', response)
+        response = self.client.get(f'/api/articles/{self.article.id}', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_etag_needs_no_aggregate(self):
+        with CaptureQueriesContext(connection) as queries:
+            etag = self.client.get('/api/articles/', HTTP_IF_NONE_MATCH='"stale"')['ETag']
+            response = self.client.get('/api/articles/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        for query in queries:
+            self.assertNotIn('MAX(', query['sql'])
+            self.assertNotIn('SUM(', query['sql'])
+
+    def test_detail_not_modified_without_serializing(self):
+        etag = self.client.get(f'/api/articles/{self.article.id}', HTTP_IF_NONE_MATCH='"stale"')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/articles/{self.article.id}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_if_modified_since(self):
+        response = self.client.get(f'/api/articles/{self.article.id}', HTTP_IF_NONE_MATCH='"stale"')
+        last_modified = response['Last-Modified']
+        response = self.client.get(f'/api/articles/{self.article.id}', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_etag_changes_on_delete(self):
+        Article.objects.create(title='Second', content='Body', author=self.user)
+        etag = self.client.get('/api/articles/')['ETag']
+        self.assertEqual(self.client.get('/api/articles/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.article.delete()
+        self.assertEqual(self.client.get('/api/articles/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ArticleSearchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        Article.objects.create(title='Django tips', content='Use select_related', author=self.user)
+        Article.objects.create(title='Cooking', content='Django is also a film', author=self.user)
+        Article.objects.create(title='Gardening', content='Tomatoes', author=self.user)
+
+    def test_search_ranks_title_matches_first(self):
+        response = self.client.get('/api/articles/search?q=django')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['title'] for item in response.json()], ['Django tips', 'Cooking'])
+
+    def test_search_sees_updates(self):
+        Article.objects.filter(title='Gardening').update(content='Django in the garden')
+        titles = [item['title'] for item in self.client.get('/api/articles/search?q=garden django').json()]
+        self.assertEqual(titles, ['Gardening'])
+
+    def test_search_tolerates_query_syntax(self):
+        response = self.client.get('/api/articles/search', {'q': 'tips" OR (*'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_requires_query(self):
+        self.assertEqual(self.client.get('/api/articles/search').status_code, 422)
+
+    def test_blank_query_matches_nothing(self):
+        for q in ('', '  '):
+            response = self.client.get('/api/articles/search', {'q': q})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), [])
+        self.assertFalse(filter_matching(Article.objects.all(), '  ').exists())
+        self.assertFalse(rank_matching(Article.objects.all(), '').exists())
+
+
+class ArticleAsyncReadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.article = Article.objects.create(title='Async', content='Body', author=self.user)
+
+    async def test_reads_through_async_client(self):
+        client = AsyncClient()
+        response = await client.get('/api/articles/')
+        self.assertEqual(response.json()['items'][0]['title'], 'Async')
+        response = await client.get(f'/api/articles/{self.article.id}')
+        self.assertEqual(response.json()['author_username'], 'testuser')
+        response = await client.get('/api/articles/9999')
+        self.assertEqual(response.status_code, 404)
+
+
+class ArticleBulkTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='owner', password='pass')
+        self.other = User.objects.create_user(username='other', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.mine = Article.objects.create(title='Mine', content='Body', author=self.user)
+        self.theirs = Article.objects.create(title='Theirs', content='Body', author=self.other)
+
+    def send(self, method, data):
+        return getattr(self.client, method)(
+            '/api/articles/bulk',
+            data=json.dumps(data),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+
+    def test_bulk_create(self):
+        response = self.send('post', [
+            {'title': 'A', 'content': 'a'},
+            {'title': 'B', 'content': 'b', 'category_id': 9999},
+        ])
+        results = response.json()
+        self.assertEqual([r['status'] for r in results], [201, 400])
+        created = Article.objects.get(id=results[0]['id'])
+        self.assertEqual(created.author, self.user)
+        self.assertIsNotNone(created.created_at)
+
+    def test_bulk_update_checks_ownership(self):
+        old_updated_at = self.mine.updated_at
+        response = self.send('patch', [
+            {'id': self.mine.id, 'title': 'Renamed'},
+            {'id': self.theirs.id, 'title': 'Hack'},
+            {'id': 9999, 'title': 'Ghost'},
+        ])
+        self.assertEqual([r['status'] for r in response.json()], [200, 403, 404])
+        self.mine.refresh_from_db()
+        self.assertEqual(self.mine.title, 'Renamed')
+        self.assertGreater(self.mine.updated_at, old_updated_at)
+        self.assertEqual(Article.objects.get(id=self.theirs.id).title, 'Theirs')
+
+    def test_bulk_update_loads_each_article_once(self):
+        second = Article.objects.create(title='Second', content='Body', author=self.user)
+        untouched = Article.objects.create(title='Untouched', content='Body', author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.send('patch', [
+                {'id': self.mine.id, 'title': 'Renamed'},
+                {'id': second.id, 'content': 'Rewritten'},
+                {'id': untouched.id},
+            ])
+        self.assertEqual([r['status'] for r in response.json()], [200, 200, 200])
+        selects = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'articles_article' in q['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(Article.objects.get(id=self.mine.id).content, 'Body')
+        self.assertEqual(Article.objects.get(id=second.id).content, 'Rewritten')
+        self.assertEqual(Article.objects.get(id=untouched.id).updated_at, untouched.updated_at)
+
+    def test_bulk_delete_checks_ownership(self):
+        response = self.send('delete', {'ids': [self.mine.id, self.theirs.id]})
+        self.assertEqual([r['status'] for r in response.json()], [204, 403])
+        self.assertEqual(list(Article.objects.values_list('id', flat=True)), [self.theirs.id])
+
+    def test_bulk_limit(self):
+        with self.settings(API_BULK_MAX_ITEMS=1):
+            response = self.send('post', [{'title': 'A', 'content': 'a'}] * 2)
+        self.assertEqual(response.status_code, 400)
+
+
+class ArticleWriteQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='owner', password='pass')
+        self.other = User.objects.create_user(username='other', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.other_token = AuthToken.objects.create(user=self.other)
+        self.article = Article.objects.create(title='Old', content='Body', author=self.user)
+        # Warm the token cache so only the handler's own queries are counted.
+        TokenAuth().authenticate(None, self.token.key)
+        TokenAuth().authenticate(None, self.other_token.key)
+
+    def put(self, token):
+        return self.client.put(
+            f'/api/articles/{self.article.id}',
+            data=json.dumps({'title': 'Updated'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token.key}',
+        )
+
+    def test_update_own_article_queries(self):
+        # UPDATE ... WHERE author_id, then one SELECT joined with the author.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.put(self.token).status_code, 200)
+
+    def test_update_other_article_queries(self):
+        # The 0-row UPDATE, then a single lookup of the owner's username.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.put(self.other_token).status_code, 403)
+
+    def test_update_missing_article_is_404(self):
+        response = self.client.put(
+            '/api/articles/9999',
+            data=json.dumps({'title': 'Updated'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_delete_own_article_queries(self):
+        # Collect the article and its comments, then the DELETEs.
+        with self.assertNumQueries(3):
+            response = self.client.delete(
+                f'/api/articles/{self.article.id}',
+                HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+            )
+        self.assertEqual(response.status_code, 204)
+
+    def test_delete_with_comments_does_not_update_counters(self):
+        for text in ('a', 'b', 'c'):
+            Comment.objects.create(text=text, author=self.other, article=self.article)
+        # Collect the article and its comments, then delete both; no per-comment UPDATE.
+        with self.assertNumQueries(4):
+            response = self.client.delete(
+                f'/api/articles/{self.article.id}',
+                HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_save_with_deferred_fields_does_not_load_them(self):
+        article = Article.objects.defer('content').get(id=self.article.id)
+        article.title = 'Renamed'
+        with self.assertNumQueries(1):
+            article.save()
+        article = Article.objects.get(id=self.article.id)
+        self.assertEqual((article.title, article.content), ('Renamed', 'Body'))
+
+    def test_delete_other_article_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.delete(
+                f'/api/articles/{self.article.id}',
+                HTTP_AUTHORIZATION=f'Bearer {self.other_token.key}',
+            )
+        self.assertEqual(response.status_code, 403)
+
+
+class ArticleAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.category = Category.objects.create(name='Python', slug='python')
+        self.article = Article.objects.create(title='Hot', content='Body', author=self.admin, category=self.category)
+
+    def test_blank_search_box_lists_everything(self):
+        response = self.client.get('/admin/articles/article/', {'q': '   '})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Hot')
+
+    def test_delete_does_not_update_comment_counters(self):
+        self.add_rows(3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/admin/articles/article/{self.article.id}/delete/', {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Article.objects.filter(id=self.article.id).exists())
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE "articles_article"')])
+
+    def add_rows(self, count):
+        for i in range(count):
+            author = User.objects.create_user(username=f'author{User.objects.count()}', password='pass')
+            article = Article.objects.create(title=f'A{i}', content='Body', author=author, category=self.category)
+            Comment.objects.create(text='Hi', author=author, article=self.article)
+            Comment.objects.create(text='Hi', author=self.admin, article=article)
+
+    def query_count(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_page_queries_do_not_grow_with_rows(self):
+        urls = ['/admin/articles/article/', f'/admin/articles/article/{self.article.id}/change/']
+        self.add_rows(2)
+        [self.query_count(url) for url in urls]  # Warm the content type cache.
+        before = [self.query_count(url) for url in urls]
+        self.add_rows(10)
+        self.assertEqual([self.query_count(url) for url in urls], before)
+
+    def test_inline_shows_recent_rows_only(self):
+        self.add_rows(5)
+        with self.settings(ADMIN_INLINE_MAX_ROWS=3):
+            response = self.client.get(f'/admin/articles/article/{self.article.id}/change/')
+        self.assertContains(response, 'name="comments-INITIAL_FORMS" value="3"')
+
+    def test_estimated_count_for_unfiltered_large_table(self):
+        with mock.patch('blog_project.admin.estimated_count', return_value=250000):
+            response = self.client.get('/admin/articles/article/')
+            self.assertEqual(response.context['cl'].result_count, 250000)
+            filtered = self.client.get(f'/admin/articles/article/?category__id__exact={self.category.id}')
+            self.assertEqual(filtered.context['cl'].result_count, 1)
+        with mock.patch('blog_project.admin.estimated_count', return_value=50):
+            self.assertEqual(self.client.get('/admin/articles/article/').context['cl'].result_count, 1)
+
+
+class FastRenderingTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.article = Article.objects.create(title='Test', content='Body', author=self.user)
+        self.operation = list_articles._ninja_operation
+
+    def test_list_rows_skip_schema_validation(self):
+        with mock.patch.object(self.operation.response_models[200], 'model_validate', side_effect=AssertionError):
+            response = self.client.get('/api/articles/?excerpt=true')
+        self.assertEqual(response.status_code, 200)
+        item = response.json()['items'][0]
+        self.assertEqual(item['author_username'], 'testuser')
+        self.assertEqual(item['excerpt'], 'Body')
+        self.assertNotIn('content', item)
+
+    def test_list_matches_response_schema(self):
+        response = self.client.get('/api/articles/?view=full')
+        self.assertEqual(response['Content-Type'], 'application/json; charset=utf-8')
+        fast = response.json()
+        validated = self.operation.response_models[200].model_validate({'response': fast})
+        dumped = validated.model_dump(by_alias=True, exclude_unset=True)['response']
+        self.assertEqual(json.loads(json.dumps(dumped, cls=NinjaJSONEncoder)), fast)
+
+    def test_datetimes_keep_django_format(self):
+        item = self.client.get('/api/articles/').json()['items'][0]
+        detail = self.client.get(f'/api/articles/{self.article.id}').json()
+        self.assertEqual(item['created_at'], detail['created_at'])
+        self.assertRegex(item['created_at'], r'T\d\d:\d\d:\d\d(\.\d{3})?Z$')
+
+    def test_stdlib_fallback_renders_same_document(self):
+        fast = self.client.get('/api/articles/').json()
+        cache.clear()
+        with mock.patch('blog_project.renderers.orjson', None):
+            self.assertEqual(self.client.get('/api/articles/').json(), fast)
+
+
+class ArticleExportTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='pass', is_staff=True)
+        self.auth = {'Authorization': f'Bearer {AuthToken.objects.create(user=self.staff).key}'}
+        self.old = Article.objects.create(title='Old', content='Body', author=self.staff)
+        Article.objects.filter(id=self.old.id).update(updated_at=timezone.now() - timedelta(days=10))
+        self.new = Article.objects.create(title='New', content='Body', author=self.staff)
+
+    async def export(self, params=None, **headers):
+        response = await AsyncClient().get('/api/articles/export', params, headers={**self.auth, **headers})
+        chunks = [chunk async for chunk in response.streaming_content]
+        return response, chunks
+
+    async def test_streams_one_json_object_per_line(self):
+        with self.settings(EXPORT_CHUNK_SIZE=1):
+            response, chunks = await self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Old', 'New'])
+        self.assertEqual(rows[0]['author_username'], 'staff')
+        self.assertEqual(rows[0]['content'], 'Body')
+        self.assertGreaterEqual(len(chunks), 2)
+
+    async def test_updated_range(self):
+        after = (timezone.now() - timedelta(days=1)).isoformat()
+        _, chunks = await self.export({'updated_after': after})
+        self.assertEqual([json.loads(line)['title'] for line in b''.join(chunks).splitlines()], ['New'])
+        _, chunks = await self.export({'updated_before': after})
+        self.assertEqual([json.loads(line)['title'] for line in b''.join(chunks).splitlines()], ['Old'])
+
+    async def test_gzip_when_accepted(self):
+        response, chunks = await self.export(**{'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(gzip.decompress(b''.join(chunks)).splitlines()), 2)
+
+    async def test_gzip_refused_with_zero_q(self):
+        for header in ('gzip;q=0, deflate', 'gzip; q=0.0, *', 'identity', 'x-gzip-like'):
+            response, chunks = await self.export(**{'Accept-Encoding': header})
+            self.assertNotIn('Content-Encoding', response, header)
+            self.assertEqual(len(b''.join(chunks).splitlines()), 2)
+        response, _ = await self.export(**{'Accept-Encoding': 'br;q=1, *;q=0.5'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    async def test_staff_only(self):
+        user = await User.objects.acreate(username='reader')
+        token = await AuthToken.objects.acreate(user=user)
+        client = AsyncClient()
+        response = await client.get('/api/articles/export', headers={'Authorization': f'Bearer {token.key}'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual((await client.get('/api/articles/export')).status_code, 401)
+
+    def test_export_blog_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'articles.ndjson.gz')
+            after = (timezone.now() - timedelta(days=1)).isoformat()
+            call_command('export_blog', 'articles', output=path, updated_after=parse_datetime(after), chunk_size=1)
+            with gzip.open(path) as stream:
+                rows = [json.loads(line) for line in stream]
+        self.assertEqual([row['title'] for row in rows], ['New'])
+
+
+class ImportBlogTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with (gzip.open if name.endswith('.gz') else open)(path, 'wt') as stream:
+            stream.write(text)
+        return path
+
+    def load(self, table, name, text, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_blog', table, self.write(name, text), stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_users_with_prehashed_and_raw_passwords(self):
+        encoded = User(username='x')
+        encoded.set_password('secret')
+        rows = [
+            {'username': 'hashed', 'password': encoded.password, 'email': 'h@example.com'},
+            {'username': 'plain', 'raw_password': 'secret2', 'is_staff': True},
+            {'username': 'nopass'},
+            {'username': 'broken', 'password': 'not-a-hash'},
+        ]
+        out, err = self.load('users', 'users.ndjson', ''.join(json.dumps(row) + '\n' for row in rows), batch_size=2)
+        self.assertIn('imported 3 rows', out)
+        self.assertIn('rows/s', out)
+        self.assertIn('row 4: password', err)
+        self.assertEqual(User.objects.get(username='hashed').password, encoded.password)
+        self.assertTrue(User.objects.get(username='plain').check_password('secret2'))
+        self.assertTrue(User.objects.get(username='plain').is_staff)
+        self.assertFalse(User.objects.get(username='nopass').has_usable_password())
+
+        out, err = self.load('users', 'again.ndjson', json.dumps({'username': 'plain'}))
+        self.assertIn('already exists', err)
+
+    def test_articles_from_csv_resolve_authors_and_categories(self):
+        User.objects.create_user(username='alice')
+        category = Category.objects.create(name='Tech', slug='tech')
+        text = (
+            'title,content,author_username,category_slug,created_at\n'
+            'First,Body,alice,tech,2024-01-02T03:04:05Z\n'
+            'Second,Body,alice,,\n'
+            'Lost,Body,nobody,,\n'
+            'Odd,Body,alice,missing,\n'
+        )
+        out, err = self.load('articles', 'articles.csv.gz', text)
+        self.assertIn('imported 2 rows', out)
+        self.assertIn('skipped 2', out)
+        self.assertIn("unknown author 'nobody'", err)
+        self.assertIn("unknown category 'missing'", err)
+        first = Article.objects.get(title='First')
+        self.assertEqual(first.category_id, category.id)
+        self.assertEqual(first.created_at.isoformat(), '2024-01-02T03:04:05+00:00')
+        self.assertEqual(first.updated_at, first.created_at)
+        self.assertIsNone(Article.objects.get(title='Second').category_id)
+
+    def test_comments_update_counts_and_keep_ids(self):
+        alice = User.objects.create_user(username='alice')
+        article = Article.objects.create(title='A', content='B', author=alice)
+        other = Article.objects.create(title='C', content='D', author=alice)
+        rows = [
+            {'id': 500, 'text': 'one', 'author_username': 'alice', 'article_id': article.id},
+            {'text': 'two', 'author_username': 'alice', 'article_id': article.id},
+            {'text': 'three', 'author_username': 'alice', 'article_id': other.id},
+            {'text': 'gone', 'author_username': 'alice', 'article_id': 9999},
+        ]
+        out, err = self.load('comments', 'comments.ndjson', ''.join(json.dumps(row) + '\n' for row in rows))
+        self.assertIn('imported 3 rows', out)
+        self.assertIn('unknown article 9999', err)
+        self.assertTrue(Comment.objects.filter(id=500, text='one').exists())
+        article.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((article.comment_count, other.comment_count), (2, 1))
+        self.assertGreater(Comment.objects.create(text='new', author=alice, article=other).id, 500)
+
+    def test_bad_rows_are_skipped_not_fatal(self):
+        alice = User.objects.create_user(username='alice')
+        existing = Article.objects.create(title='Old', content='Body', author=alice)
+        good = {'title': 'Good', 'content': 'Body', 'author_username': 'alice'}
+        lines = [
+            json.dumps(good),
+            '{"title": broken',
+            '[1, 2]',
+            json.dumps({**good, 'created_at': '2020-13-45T00:00:00'}),
+            json.dumps({**good, 'id': existing.id}),
+            json.dumps({**good, 'id': 900}),
+            json.dumps({**good, 'id': 900}),
+            json.dumps({**good, 'title': 'Last'}),
+        ]
+        out, err = self.load('articles', 'articles.ndjson', '\n'.join(lines) + '\n')
+        self.assertIn('imported 3 rows', out)
+        self.assertIn('skipped 5', out)
+        self.assertIn('row 2: invalid JSON', err)
+        self.assertIn('row 3: not a JSON object', err)
+        self.assertIn('row 4: created_at is not an ISO 8601 datetime', err)
+        self.assertIn(f'row 5: id {existing.id} already exists', err)
+        self.assertIn('row 7: id 900 already exists', err)
+        self.assertEqual(
+            sorted(Article.objects.values_list('title', flat=True)), ['Good', 'Good', 'Last', 'Old'],
+        )
+
+    def test_over_long_values_are_rejected(self):
+        User.objects.create_user(username='alice')
+        out, err = self.load('users', 'users.ndjson', json.dumps({'username': 'u' * 151}) + '\n')
+        self.assertIn('skipped 1', out)
+        self.assertIn('row 1: username is longer than 150 characters', err)
+
+        lines = [
+            json.dumps({'title': 't' * 301, 'content': 'Body', 'author_username': 'alice'}),
+            json.dumps({'title': 't' * 300, 'content': 'Body', 'author_username': 'alice'}),
+        ]
+        out, err = self.load('articles', 'articles.ndjson', '\n'.join(lines) + '\n')
+        self.assertIn('imported 1 rows', out)
+        self.assertIn('row 1: title is longer than 300 characters', err)
+
+    def test_copy_needs_postgresql(self):
+        with self.assertRaisesMessage(CommandError, 'PostgreSQL'):
+            self.load('users', 'users.ndjson', '', copy=True)
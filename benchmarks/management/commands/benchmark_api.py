@@ -0,0 +1,117 @@
+import json
+import logging
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and measure p50/p99 latency, queries and '
+        'response bytes for every API route; optionally compare against a saved baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--max-comments', type=int, default=200,
+                            help='Comments on the most discussed article; the rest follow a Zipf curve.')
+        parser.add_argument('--skew', type=float, default=1.2)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', action='append', metavar='ROUTE',
+                            help='Measure only this route ("GET /api/articles/"); repeatable.')
+        parser.add_argument('--no-cache', action='store_true', help='Run with API_CACHE_TIMEOUT=0.')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database between runs and reuse already seeded data.')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as a JSON baseline.')
+        parser.add_argument('--compare', metavar='PATH', help='Fail if the run regresses against this baseline.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed relative growth of p50/p99/bytes (query counts may never grow).')
+
+    def handle(self, *args, **options):
+        unknown = set(options['only'] or ()) - set(runner.SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown route(s): {", ".join(sorted(unknown))}')
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            from django.contrib.auth.models import User
+
+            if not User.objects.filter(username='bench-admin').exists():
+                self.stdout.write(f"Seeding {options['articles']} article(s)...")
+                runner.seed(
+                    articles=options['articles'],
+                    users=options['users'],
+                    max_comments=options['max_comments'],
+                    skew=options['skew'],
+                )
+            for cache in caches.all():
+                cache.clear()
+            cache_timeout = 0 if options['no_cache'] else settings.API_CACHE_TIMEOUT
+            # Per-request INFO logging would both flood the output and skew timings.
+            logging.disable(logging.INFO)
+            with override_settings(API_CACHE_TIMEOUT=cache_timeout):
+                try:
+                    results = runner.run(options['iterations'], options['warmup'], options['only'])
+                except LookupError as exc:
+                    raise CommandError(str(exc))
+                finally:
+                    logging.disable(logging.NOTSET)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self._report(results, baseline)
+
+        if options['save']:
+            payload = {
+                'meta': {
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'vendor': connection.vendor,
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'articles': options['articles'],
+                    'max_comments': options['max_comments'],
+                    'iterations': options['iterations'],
+                    'cache': not options['no_cache'],
+                },
+                'results': results,
+            }
+            with open(options['save'], 'w') as f:
+                json.dump(payload, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Saved baseline to {options['save']}")
+
+        if baseline is not None:
+            regressions = runner.compare(results, baseline['results'], options['threshold'])
+            if regressions:
+                raise CommandError('Regressions against baseline:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
+
+    def _report(self, results, baseline):
+        previous = baseline['results'] if baseline else {}
+        width = max(len(route) for route in results)
+        self.stdout.write(f"{'route':<{width}}  {'p50 ms':>9}  {'p99 ms':>9}  {'queries':>7}  {'bytes':>9}  status")
+        for route, row in results.items():
+            line = (
+                f"{route:<{width}}  {row['p50_ms']:>9.2f}  {row['p99_ms']:>9.2f}  "
+                f"{row['queries']:>7}  {row['bytes']:>9}  {','.join(map(str, row['statuses']))}"
+            )
+            if route in previous:
+                line += f"  (baseline p50 {previous[route]['p50_ms']:.2f}, queries {previous[route]['queries']})"
+            self.stdout.write(line)
@@ -0,0 +1,65 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from itertools import cycle
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Load a running server over HTTP and report requests/sec. Unlike benchmark_api this '
+        'goes through the real server stack, so it shows connection setup, pooling and worker costs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', required=True,
+                            help='URL to request; repeat to rotate between several.')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run.')
+        parser.add_argument('--token', help='Bearer token sent with every request.')
+        parser.add_argument('--timeout', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        headers = {'Authorization': f"Bearer {options['token']}"} if options['token'] else {}
+        urls = cycle(options['url'])
+        lock = threading.Lock()
+        timings, errors = [], []
+        deadline = time.monotonic() + options['duration']
+
+        def worker():
+            local_timings, local_errors = [], []
+            while time.monotonic() < deadline:
+                with lock:
+                    url = next(urls)
+                request = urllib.request.Request(url, headers=headers)
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                        response.read()
+                except (urllib.error.URLError, OSError) as exc:
+                    local_errors.append(str(exc))
+                    continue
+                local_timings.append((time.perf_counter() - started) * 1000)
+            with lock:
+                timings.extend(local_timings)
+                errors.extend(local_errors)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        if not timings:
+            raise CommandError(f"No successful requests ({len(errors)} error(s)): {errors[:1]}")
+        self.stdout.write(
+            f'{len(timings) / elapsed:.1f} req/s over {elapsed:.1f}s, concurrency {options["concurrency"]}; '
+            f'p50 {percentile(timings, 0.50):.2f} ms, p99 {percentile(timings, 0.99):.2f} ms, '
+            f'{len(errors)} error(s)'
+        )
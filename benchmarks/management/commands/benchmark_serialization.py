@@ -0,0 +1,104 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import timezone
+from ninja.renderers import JSONRenderer
+
+from articles.api import list_articles
+from blog_project.renderers import FastJSONRenderer, json_response, orjson
+from blog_project.urls import api
+from comments.api import list_comments
+from comments.models import Comment
+
+
+def _article_rows(count):
+    now = timezone.now()
+    return [
+        {
+            'id': i, 'title': f'Article {i}', 'author_id': i % 50, 'category_id': i % 10,
+            'comment_count': i % 7, 'created_at': now - timedelta(seconds=i), 'updated_at': now,
+            'author_username': f'user-{i % 50}',
+        }
+        for i in range(count)
+    ]
+
+
+def _comment_rows(count):
+    now = timezone.now()
+    return [
+        {
+            'id': i, 'text': 'Nice article, thanks! ' * 5, 'author_id': i % 50, 'article_id': 1,
+            'created_at': now - timedelta(seconds=i), 'updated_at': now, 'author_username': f'user-{i % 50}',
+        }
+        for i in range(count)
+    ]
+
+
+def _comment_instances(count):
+    # What list_comments returned before: select_related model instances.
+    authors = [User(id=i, username=f'user-{i}') for i in range(50)]
+    instances = []
+    for row in _comment_rows(count):
+        del row['author_username']
+        comment = Comment(**row)
+        comment.author = authors[row['author_id']]
+        instances.append(comment)
+    return instances
+
+
+class Command(BaseCommand):
+    help = (
+        'Time response serialization (schema validation plus JSON rendering) per N rows for the '
+        'list endpoints, with and without validation and with the stdlib and orjson renderers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write('orjson is not installed; the fast renderer falls back to the stdlib.')
+        rows, repeat = options['rows'], options['repeat']
+        request = RequestFactory().get('/api/')
+        cases = [
+            ('GET /api/articles/', list_articles, {
+                'validated, json': (_article_rows, True, JSONRenderer()),
+                'validated, orjson': (_article_rows, True, FastJSONRenderer()),
+                'values rows, orjson': (_article_rows, False, FastJSONRenderer()),
+            }),
+            ('GET /api/articles/{article_id}/comments', list_comments, {
+                'instances, validated, json': (_comment_instances, True, JSONRenderer()),
+                'instances, validated, orjson': (_comment_instances, True, FastJSONRenderer()),
+                'values rows, orjson': (_comment_rows, False, FastJSONRenderer()),
+            }),
+        ]
+
+        renderer = api.renderer
+        self.stdout.write(f'{"route":<42} {"mode":<32} {f"ms/{rows} rows":>14} {"speedup":>8}')
+        try:
+            for route, view, modes in cases:
+                operation = view._ninja_operation
+                baseline = None
+                for mode, (make_rows, validate, mode_renderer) in modes.items():
+                    api.renderer = mode_renderer
+                    timings = []
+                    for _ in range(repeat):
+                        result = {'items': make_rows(rows), 'next_cursor': None}
+                        temporal_response = api.create_temporal_response(request)
+                        started = time.perf_counter()
+                        if validate:
+                            operation._result_to_response(request, result, temporal_response)
+                        else:
+                            # What skip_response_validation does with the view's result.
+                            json_response(result)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    median = statistics.median(timings)
+                    baseline = baseline or median
+                    self.stdout.write(f'{route:<42} {mode:<32} {median:>14.2f} {baseline / median:>7.1f}x')
+        finally:
+            api.renderer = renderer
@@ -0,0 +1,359 @@
+import json
+import random
+import statistics
+import time
+import warnings
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from ninja_jwt.tokens import RefreshToken
+
+from articles.models import Article
+from blog_project.urls import api
+from categories.models import Category
+from comments.models import Comment
+from users.models import AuthToken
+
+PASSWORD = 'bench-pass-123'
+WORDS = (
+    'django ninja query index cursor cache token article comment latency throughput '
+    'postgres sqlite async worker pool replica vector search rank page batch stream'
+).split()
+
+SCENARIOS = {}
+
+
+def scenario(route):
+    """Register a request factory for ``route`` ("METHOD /path" as in the OpenAPI schema).
+
+    The factory runs untimed and returns the callable whose request is measured.
+    """
+    def register(func):
+        SCENARIOS[route] = func
+        return func
+    return register
+
+
+def api_routes():
+    schema = api.get_openapi_schema()
+    return sorted(
+        f'{method.upper()} {path}'
+        for path, operations in schema['paths'].items()
+        for method in operations
+    )
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(articles=1000, users=20, max_comments=200, skew=1.2, batch_size=1000, random_seed=0):
+    """Fill the database with ``articles`` articles whose comment counts follow a Zipf-like curve."""
+    rng = random.Random(random_seed)
+    password = make_password(PASSWORD)
+    authors = User.objects.bulk_create(
+        [User(username=f'bench-user-{i}', password=password) for i in range(users)]
+    )
+    User.objects.create_superuser('bench-admin', 'admin@example.com', PASSWORD)
+    categories = Category.objects.bulk_create(
+        [Category(name=f'Category {i}', slug=f'category-{i}') for i in range(10)]
+    )
+
+    article_ids = []
+    for start in range(0, articles, batch_size):
+        batch = [
+            Article(
+                title=_text(rng, 6),
+                content=_text(rng, 300),
+                author=rng.choice(authors),
+                category=rng.choice(categories),
+            )
+            for _ in range(start, min(start + batch_size, articles))
+        ]
+        article_ids += [article.id for article in Article.objects.bulk_create(batch)]
+
+    rng.shuffle(article_ids)
+    comments, counts = [], {}
+    for rank, article_id in enumerate(article_ids, start=1):
+        count = int(max_comments / rank ** skew)
+        if not count:
+            break
+        counts[article_id] = count
+        comments += [
+            Comment(text=_text(rng, 30), author=rng.choice(authors), article_id=article_id)
+            for _ in range(count)
+        ]
+    Comment.objects.bulk_create(comments, batch_size=batch_size)
+    for article_id, count in counts.items():
+        Article.objects.filter(id=article_id).update(comment_count=count)
+
+
+class Context:
+    """Users, fresh bearer tokens and hot ids shared by the scenarios."""
+
+    def __init__(self):
+        self.client = Client()
+        self.user = User.objects.get(username='bench-user-0')
+        self.admin = User.objects.get(username='bench-admin')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AuthToken.objects.create(user=self.user).key}'}
+        self.article_ids = list(Article.objects.order_by('-comment_count', 'id').values_list('id', flat=True)[:100])
+        self.hot_article_id = self.article_ids[0]
+        self.category_ids = list(Category.objects.values_list('id', flat=True))
+        self.hot_comment_ids = list(
+            Comment.objects.filter(article_id=self.hot_article_id).values_list('id', flat=True)[:100]
+        )
+        self.admin_auth = {'HTTP_AUTHORIZATION': f'Bearer {AuthToken.objects.create(user=self.admin).key}'}
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+        self.counter = 0
+        self.own_article_id = self.new_article().id
+
+    def unique(self):
+        self.counter += 1
+        return self.counter
+
+    def json(self, method, path, data, **extra):
+        return getattr(self.client, method)(
+            path, data=json.dumps(data), content_type='application/json', **{**self.auth, **extra}
+        )
+
+    def new_article(self):
+        return Article.objects.create(title='Scratch', content=_text(random, 50), author=self.user)
+
+    def new_comment(self, article_id=None):
+        return Comment.objects.create(text='Scratch', author=self.user, article_id=article_id or self.hot_article_id)
+
+
+@scenario('POST /api/token/pair')
+def _(ctx, i):
+    return lambda: ctx.json('post', '/api/token/pair', {'username': 'bench-user-0', 'password': PASSWORD})
+
+
+@scenario('POST /api/token/refresh')
+def _(ctx, i):
+    refresh = str(RefreshToken.for_user(ctx.user))
+    return lambda: ctx.json('post', '/api/token/refresh', {'refresh': refresh})
+
+
+@scenario('POST /api/token/verify')
+def _(ctx, i):
+    token = str(RefreshToken.for_user(ctx.user).access_token)
+    return lambda: ctx.json('post', '/api/token/verify', {'token': token})
+
+
+@scenario('POST /api/auth/register')
+def _(ctx, i):
+    username = f'bench-new-{ctx.unique()}-{time.time_ns()}'
+    return lambda: ctx.json('post', '/api/auth/register', {'username': username, 'password': PASSWORD})
+
+
+@scenario('POST /api/auth/login')
+def _(ctx, i):
+    return lambda: ctx.json('post', '/api/auth/login', {'username': 'bench-user-0', 'password': PASSWORD})
+
+
+@scenario('POST /api/auth/logout')
+def _(ctx, i):
+    key = AuthToken.objects.create(user=ctx.user).key
+    return lambda: ctx.client.post('/api/auth/logout', HTTP_AUTHORIZATION=f'Bearer {key}')
+
+
+@scenario('GET /api/articles/')
+def _(ctx, i):
+    return lambda: ctx.client.get('/api/articles/')
+
+
+@scenario('GET /api/categories/')
+def _(ctx, i):
+    return lambda: ctx.client.get('/api/categories/')
+
+
+@scenario('GET /api/categories/{category_id}')
+def _(ctx, i):
+    category_id = ctx.category_ids[i % len(ctx.category_ids)]
+    return lambda: ctx.client.get(f'/api/categories/{category_id}')
+
+
+@scenario('POST /api/articles/')
+def _(ctx, i):
+    return lambda: ctx.json('post', '/api/articles/', {'title': 'Bench', 'content': _text(random, 300)})
+
+
+@scenario('GET /api/articles/search')
+def _(ctx, i):
+    word = WORDS[i % len(WORDS)]
+    return lambda: ctx.client.get('/api/articles/search', {'q': word})
+
+
+@scenario('GET /api/articles/export')
+def _(ctx, i):
+    return lambda: ctx.client.get('/api/articles/export', **ctx.admin_auth)
+
+
+@scenario('GET /api/comments/export')
+def _(ctx, i):
+    return lambda: ctx.client.get('/api/comments/export', **ctx.admin_auth)
+
+
+@scenario('GET /api/articles/{article_id}')
+def _(ctx, i):
+    article_id = ctx.article_ids[i % len(ctx.article_ids)]
+    return lambda: ctx.client.get(f'/api/articles/{article_id}')
+
+
+@scenario('PUT /api/articles/{article_id}')
+def _(ctx, i):
+    return lambda: ctx.json('put', f'/api/articles/{ctx.own_article_id}', {'title': f'Edit {i}'})
+
+
+@scenario('DELETE /api/articles/{article_id}')
+def _(ctx, i):
+    article_id = ctx.new_article().id
+    return lambda: ctx.client.delete(f'/api/articles/{article_id}', **ctx.auth)
+
+
+@scenario('POST /api/articles/bulk')
+def _(ctx, i):
+    items = [{'title': f'Bulk {n}', 'content': 'Body'} for n in range(50)]
+    return lambda: ctx.json('post', '/api/articles/bulk', items)
+
+
+@scenario('PATCH /api/articles/bulk')
+def _(ctx, i):
+    ids = [ctx.new_article().id for _ in range(50)]
+    return lambda: ctx.json('patch', '/api/articles/bulk', [{'id': pk, 'title': 'Bulk edit'} for pk in ids])
+
+
+@scenario('DELETE /api/articles/bulk')
+def _(ctx, i):
+    ids = [ctx.new_article().id for _ in range(50)]
+    return lambda: ctx.json('delete', '/api/articles/bulk', {'ids': ids})
+
+
+@scenario('GET /api/articles/{article_id}/comments')
+def _(ctx, i):
+    return lambda: ctx.client.get(f'/api/articles/{ctx.hot_article_id}/comments')
+
+
+@scenario('POST /api/articles/{article_id}/comments')
+def _(ctx, i):
+    return lambda: ctx.json('post', f'/api/articles/{ctx.hot_article_id}/comments', {'text': 'Bench'})
+
+
+@scenario('GET /api/articles/{article_id}/comments/{comment_id}')
+def _(ctx, i):
+    comment_id = ctx.hot_comment_ids[i % len(ctx.hot_comment_ids)]
+    return lambda: ctx.client.get(f'/api/articles/{ctx.hot_article_id}/comments/{comment_id}')
+
+
+@scenario('PUT /api/articles/{article_id}/comments/{comment_id}')
+def _(ctx, i):
+    comment = ctx.new_comment()
+    return lambda: ctx.json('put', f'/api/articles/{ctx.hot_article_id}/comments/{comment.id}', {'text': 'Edit'})
+
+
+@scenario('DELETE /api/articles/{article_id}/comments/{comment_id}')
+def _(ctx, i):
+    comment = ctx.new_comment()
+    return lambda: ctx.client.delete(f'/api/articles/{ctx.hot_article_id}/comments/{comment.id}', **ctx.auth)
+
+
+@scenario('POST /api/articles/{article_id}/comments/bulk')
+def _(ctx, i):
+    items = [{'text': f'Bulk {n}'} for n in range(50)]
+    return lambda: ctx.json('post', f'/api/articles/{ctx.hot_article_id}/comments/bulk', items)
+
+
+@scenario('PATCH /api/articles/{article_id}/comments/bulk')
+def _(ctx, i):
+    ids = [ctx.new_comment().id for _ in range(50)]
+    items = [{'id': pk, 'text': 'Bulk edit'} for pk in ids]
+    return lambda: ctx.json('patch', f'/api/articles/{ctx.hot_article_id}/comments/bulk', items)
+
+
+@scenario('DELETE /api/articles/{article_id}/comments/bulk')
+def _(ctx, i):
+    ids = [ctx.new_comment().id for _ in range(50)]
+    return lambda: ctx.json('delete', f'/api/articles/{ctx.hot_article_id}/comments/bulk', {'ids': ids})
+
+
+@scenario('GET /admin/articles/article/')
+def _(ctx, i):
+    return lambda: ctx.admin_client.get('/admin/articles/article/')
+
+
+@scenario('GET /admin/comments/comment/')
+def _(ctx, i):
+    return lambda: ctx.admin_client.get('/admin/comments/comment/')
+
+
+@scenario('GET /admin/auth/user/{id}/change/')
+def _(ctx, i):
+    return lambda: ctx.admin_client.get(f'/admin/auth/user/{ctx.user.id}/change/')
+
+
+def _response_size(response):
+    if getattr(response, 'streaming', False):
+        with warnings.catch_warnings():
+            # The sync test client drains async bodies (the exports) through async_to_sync.
+            warnings.simplefilter('ignore')
+            return sum(len(chunk) for chunk in response)
+    return len(response.content)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(ctx, route, iterations, warmup):
+    factory = SCENARIOS[route]
+    timings, queries, sizes, statuses = [], [], [], set()
+    for i in range(warmup + iterations):
+        send = factory(ctx, i)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send()
+            size = _response_size(response)
+            elapsed = time.perf_counter() - started
+        if i < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(len(captured.captured_queries))
+        sizes.append(size)
+        statuses.add(response.status_code)
+    return {
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'queries': statistics.median(queries),
+        'bytes': statistics.median(sizes),
+        'statuses': sorted(statuses),
+    }
+
+
+def run(iterations=50, warmup=5, routes=None):
+    missing = sorted(set(api_routes()) - set(SCENARIOS))
+    if missing:
+        raise LookupError(f'No benchmark scenario for: {", ".join(missing)}')
+    ctx = Context()
+    # Auth endpoints are measured repeatedly from one address; don't let the rate limits answer them.
+    with override_settings(AUTH_LOGIN_FAILURES_PER_IP='', AUTH_REGISTRATIONS_PER_IP=''):
+        return {route: measure(ctx, route, iterations, warmup) for route in routes or sorted(SCENARIOS)}
+
+
+def compare(results, baseline, threshold):
+    """Return a description of every metric that got worse than ``baseline`` by more than ``threshold``."""
+    regressions = []
+    for route, current in results.items():
+        previous = baseline.get(route)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{route}: queries {previous['queries']} -> {current['queries']}")
+        for metric in ('p50_ms', 'p99_ms', 'bytes'):
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f'{route}: {metric} {previous[metric]} -> {current[metric]}')
+    return regressions
@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from articles.models import Article
+from benchmarks import runner
+from blog_project.renderers import FastJSONRenderer
+from blog_project.urls import api
+from comments.models import Comment
+
+
+class SeedTests(TestCase):
+    def test_seed_skews_comment_counts(self):
+        runner.seed(articles=30, users=3, max_comments=20)
+        self.assertEqual(Article.objects.count(), 30)
+        counts = list(Article.objects.order_by('-comment_count').values_list('comment_count', flat=True))
+        self.assertEqual(counts[0], 20)
+        self.assertEqual(counts[-1], 0)
+        self.assertEqual(sum(counts), Comment.objects.count())
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class RunTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        runner.seed(articles=20, users=3, max_comments=10)
+
+    def test_every_api_route_has_a_scenario(self):
+        self.assertLessEqual(set(runner.api_routes()), set(runner.SCENARIOS))
+
+    def test_every_scenario_succeeds(self):
+        results = runner.run(iterations=2, warmup=0)
+        for route, row in results.items():
+            self.assertTrue(all(status < 400 for status in row['statuses']), route)
+            self.assertGreaterEqual(row['p99_ms'], row['p50_ms'])
+
+    def test_compare_flags_regressions(self):
+        baseline = {'GET /api/articles/': {'p50_ms': 1.0, 'p99_ms': 2.0, 'queries': 2, 'bytes': 100}}
+        current = {'GET /api/articles/': {'p50_ms': 1.1, 'p99_ms': 5.0, 'queries': 3, 'bytes': 100}}
+        regressions = runner.compare(current, baseline, threshold=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('queries 2 -> 3', regressions[0])
+        self.assertIn('p99_ms', regressions[1])
+
+
+class SerializationBenchmarkTests(TestCase):
+    def test_reports_every_mode_and_restores_renderer(self):
+        out = StringIO()
+        call_command('benchmark_serialization', rows=5, repeat=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 7)
+        self.assertIsInstance(api.renderer, FastJSONRenderer)
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """Row estimate from the planner statistics (PostgreSQL only), or None."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # -1 until the table has been vacuumed or analyzed.
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin paginator that skips COUNT(*) over an unfiltered large table.
+
+    Filtered or searched changelists are counted exactly; so are tables the
+    statistics put below ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` rows.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class RecentInlineFormSet(BaseInlineFormSet):
+    """Only the first ``ADMIN_INLINE_MAX_ROWS`` related rows, in the inline's ordering."""
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            self._queryset = super().get_queryset()[:settings.ADMIN_INLINE_MAX_ROWS]
+        return self._queryset
+
+
+class ScalableAdminMixin:
+    """Changelist defaults for tables too large to count or to list in full."""
+
+    paginator = EstimatedCountPaginator
+    # Otherwise every changelist page also runs COUNT(*) over the whole table.
+    show_full_result_count = False
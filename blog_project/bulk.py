@@ -0,0 +1,21 @@
+from typing import List, Optional
+
+from django.conf import settings
+from ninja import Schema
+
+
+class BulkDeleteIn(Schema):
+    ids: List[int]
+
+
+class BulkResultOut(Schema):
+    id: Optional[int] = None
+    status: int
+    detail: Optional[str] = None
+
+
+def too_many(items):
+    """The 400 response for a bulk payload over ``API_BULK_MAX_ITEMS``, else None."""
+    if len(items) > settings.API_BULK_MAX_ITEMS:
+        return 400, {'detail': f'At most {settings.API_BULK_MAX_ITEMS} items per request'}
+    return None
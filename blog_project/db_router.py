@@ -0,0 +1,167 @@
+import hashlib
+import inspect
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+
+_state = ContextVar('replica_routing', default=None)
+
+
+def _cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+class RoutingState:
+    """Per-request routing flags; mutated from ORM threads, so it is an object, not separate ContextVars."""
+
+    __slots__ = ('pinned', 'replica_ok', 'used_replica', 'wrote')
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.replica_ok = False
+        self.used_replica = False
+        self.wrote = False
+
+
+class ReplicaRouter:
+    """Send reads to a replica only inside views marked with ``read_from_replica``.
+
+    Everything else, every write, and any read after a write in the same
+    request goes to ``default``; so does a request pinned by
+    ``ReplicaRoutingMiddleware`` because its client wrote recently.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_ok or state.pinned or state.wrote or not settings.DATABASE_REPLICAS:
+            return 'default'
+        state.used_replica = True
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def read_from_replica(run):
+    """Let the view (and the response cache around it) read from a replica. Apply with ``decorate_view``."""
+    if inspect.iscoroutinefunction(run):
+        @wraps(run)
+        async def async_wrapper(request, *args, **kwargs):
+            state = _state.get()
+            if state is not None:
+                state.replica_ok = True
+            return await run(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(run)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is not None:
+            state.replica_ok = True
+        return run(request, *args, **kwargs)
+    return wrapper
+
+
+def _written_key(scope):
+    return f'api:replica:written:{scope}'
+
+
+def record_write(*scopes):
+    """Note that data behind ``scopes`` (response cache keys or generations) changed just now."""
+    if settings.DATABASE_REPLICAS and scopes:
+        now = time.time()
+        _cache().set_many({_written_key(scope): now for scope in scopes}, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def _replica_may_be_stale(written):
+    now = time.time()
+    return any(now - last_write < settings.DB_REPLICA_STICKY_SECONDS for last_write in written.values())
+
+
+def replica_result_cacheable(scopes):
+    """False when this request read from a replica that may not have the latest write to ``scopes`` yet.
+
+    Caching such a response would serve the stale copy long after the
+    replica caught up, so the response cache skips storing it. Writes
+    elsewhere don't matter: only the ones that invalidated these scopes
+    could make this response stale.
+    """
+    state = _state.get()
+    if state is None or not state.used_replica:
+        return True
+    return not _replica_may_be_stale(_cache().get_many([_written_key(scope) for scope in scopes]))
+
+
+async def areplica_result_cacheable(scopes):
+    state = _state.get()
+    if state is None or not state.used_replica:
+        return True
+    return not _replica_may_be_stale(await _cache().aget_many([_written_key(scope) for scope in scopes]))
+
+
+def _pin_key(request):
+    identity = request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not identity:
+        return None
+    return 'api:replica:pin:' + hashlib.sha256(identity.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """Track writes per request and pin a client to the primary for a while after it writes.
+
+    Clients are told apart by their Authorization header or session cookie.
+    Removed from the chain when no replicas are configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        cache = _cache()
+        pin_key = _pin_key(request)
+        state = RoutingState(pinned=pin_key is not None and cache.get(pin_key) is not None)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and pin_key is not None:
+            cache.set(pin_key, True, settings.DB_REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        cache = _cache()
+        pin_key = _pin_key(request)
+        state = RoutingState(pinned=pin_key is not None and await cache.aget(pin_key) is not None)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and pin_key is not None:
+            await cache.aset(pin_key, True, settings.DB_REPLICA_STICKY_SECONDS)
+        return response
@@ -0,0 +1,93 @@
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+from blog_project.renderers import dumps
+
+# openapi_extra for export operations: they return a stream, not a schema-validated body.
+NDJSON_DOCS = {'responses': {200: {
+    'description': 'One JSON object per line; gzipped when the client sends Accept-Encoding: gzip.',
+    'content': {'application/x-ndjson': {}},
+}}}
+
+
+def updated_between(queryset, updated_after=None, updated_before=None):
+    """Rows with ``updated_after <= updated_at < updated_before``, in primary key order."""
+    if updated_after is not None:
+        queryset = queryset.filter(updated_at__gte=updated_after)
+    if updated_before is not None:
+        queryset = queryset.filter(updated_at__lt=updated_before)
+    return queryset.order_by('pk')
+
+
+class NDJSONEncoder:
+    """One JSON document per line, optionally gzipped as it goes."""
+
+    def __init__(self, compress=False):
+        # wbits=31: gzip container rather than a bare zlib stream.
+        self._compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(self, rows):
+        data = b''.join(dumps(row) + b'\n' for row in rows)
+        return self._compressor.compress(data) if self._compressor else data
+
+    def finish(self):
+        return self._compressor.flush() if self._compressor else b''
+
+
+def stream_ndjson(queryset, compress=False, chunk_size=None):
+    """Yield NDJSON (or gzip) chunks; holds at most ``chunk_size`` rows at a time."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    encoder = NDJSONEncoder(compress)
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while batch := list(islice(rows, chunk_size)):
+        yield encoder.encode(batch)
+    yield encoder.finish()
+
+
+async def astream_ndjson(queryset, compress=False, chunk_size=None):
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    encoder = NDJSONEncoder(compress)
+    batch = []
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield encoder.encode(batch)
+            batch = []
+    yield encoder.encode(batch) + encoder.finish()
+
+
+def accepts_gzip(request):
+    """Whether Accept-Encoding allows gzip: listed (or ``*``) with a non-zero q-value."""
+    qvalues = {}
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, *params = (part.strip() for part in coding.split(';'))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[name.lower()] = q
+    # An explicit gzip entry wins over the wildcard.
+    return qvalues.get('gzip', qvalues.get('*', 0.0)) > 0
+
+
+def ndjson_response(request, queryset, filename):
+    """Stream ``queryset`` (``.values()`` rows) as an NDJSON download, gzipped if the client accepts it.
+
+    The body is an async generator so ASGI servers send it chunk by chunk;
+    Django would buffer a sync iterator in full under ASGI.
+    """
+    compress = accepts_gzip(request)
+    response = StreamingHttpResponse(astream_ndjson(queryset, compress), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,178 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from prometheus_client import Counter
+
+LOG_RECORDS_DROPPED = Counter(
+    'log_records_dropped_total', 'Log records dropped because the log queue was full.', ['logger'],
+)
+LOG_RECORDS_SAMPLED_OUT = Counter(
+    'log_records_sampled_out_total', 'INFO records skipped by log sampling.', ['event'],
+)
+
+_request = ContextVar('log_request', default=None)
+
+# Attributes every LogRecord has; anything else came in through ``extra``.
+_RESERVED = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and every ``extra`` field."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update((key, value) for key, value in vars(record).items() if key not in _RESERVED)
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a share of high-volume INFO events, e.g. ``{'article_created': 0.1}``.
+
+    Events are matched by the ``event`` extra field; kept records carry
+    ``sample_rate`` so counts can be scaled back up. Warnings and errors are
+    never sampled.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        event = getattr(record, 'event', None)
+        rate = self.rates.get(event)
+        if rate is None or rate >= 1:
+            return True
+        if random.random() < rate:
+            record.sample_rate = rate
+            return True
+        LOG_RECORDS_SAMPLED_OUT.labels(event).inc()
+        return False
+
+
+class RequestContextFilter(logging.Filter):
+    """Add the request id, method, path and time since the request started."""
+
+    def filter(self, record):
+        context = _request.get()
+        if context is not None:
+            record.request_id, record.method, record.path, started = context
+            record.elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        return True
+
+
+class RequestLogContextMiddleware:
+    """Make the current request visible to ``RequestContextFilter``; reuses ``X-Request-ID`` if sent."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _context(self, request):
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        return (request_id[:64], request.method, request.path, time.perf_counter())
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request.set(self._context(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(self._context(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room: on shutdown the queue may still be full.
+        self.queue.put(self._sentinel)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Hand records to a bounded queue drained by a background listener thread.
+
+    Request threads never block on the output stream: when the queue is
+    full the record is dropped and counted instead. Formatting runs on the
+    listener thread. The listener starts on first use in each process, so a
+    worker forked from a preloaded master gets its own queue and thread.
+    """
+
+    def __init__(self, maxsize=10000, stream=None):
+        super().__init__(queue.Queue(maxsize))
+        self.maxsize = maxsize
+        self.target = logging.StreamHandler(stream)
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked: the parent's listener thread does not exist here.
+                self.queue = queue.Queue(self.maxsize)
+            self._listener = _Listener(self.queue, self.target)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+    def prepare(self, record):
+        # Freeze the message now (args may be mutated later) but leave the
+        # formatting to the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.labels(record.name).inc()
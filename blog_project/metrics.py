@@ -0,0 +1,173 @@
+import hmac
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from ninja.operation import PathView
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set, every worker writes its samples to mmap'd
+# files in that directory and a scrape of any worker aggregates all of them.
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+if MULTIPROCESS:
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+REQUESTS = Counter(
+    'api_requests_total', 'Handled requests.', ['operation', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'api_request_duration_seconds', 'Request latency including middleware.', ['operation'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+QUERIES = Histogram(
+    'api_request_db_queries', 'Database queries per request.', ['operation'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+IN_PROGRESS = Gauge(
+    'api_requests_in_progress', 'Requests currently being handled.', multiprocess_mode='livesum',
+)
+DB_CONNECTIONS = Counter(
+    'db_connections_opened_total', 'Database connections opened.', ['alias'],
+)
+TOKEN_CACHE = Counter(
+    'auth_token_cache_lookups_total', 'Token cache lookups by result.', ['result'],
+)
+TOKEN_CACHE_HIT = TOKEN_CACHE.labels('hit')
+TOKEN_CACHE_MISS = TOKEN_CACHE.labels('miss')
+
+_queries = ContextVar('request_query_count', default=None)
+_operation_names = {}
+
+
+class _QueryCount:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+
+def _count_query(execute, sql, params, many, context):
+    # Counted per request without locks; the histogram is observed once at the end.
+    count = _queries.get()
+    if count is not None:
+        count.value += 1
+    return execute(sql, params, many, context)
+
+
+def _install_query_counter(connection):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    DB_CONNECTIONS.labels(connection.alias).inc()
+    _install_query_counter(connection)
+
+
+connection_created.connect(_on_connection_created, dispatch_uid='api_metrics')
+
+
+def operation_name(request):
+    """Name of the Ninja view function that served the request (``list_articles``)."""
+    match = request.resolver_match
+    if match is None:
+        return 'unmatched'
+    path_view = getattr(match.func, '__self__', None)
+    if not isinstance(path_view, PathView):
+        return match.url_name or 'other'
+    key = (id(path_view), request.method)
+    name = _operation_names.get(key)
+    if name is None:
+        name = match.url_name or 'other'
+        for operation in path_view.operations:
+            if request.method in operation.methods:
+                name = operation.view_func.__name__
+                break
+        _operation_names[key] = name
+    return name
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        for connection in connections.all(initialized_only=True):
+            _install_query_counter(connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _record(self, request, response, started, count):
+        name = operation_name(request)
+        REQUESTS.labels(name, request.method, response.status_code).inc()
+        LATENCY.labels(name).observe(time.perf_counter() - started)
+        QUERIES.labels(name).observe(count.value)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        count = _QueryCount()
+        token = _queries.set(count)
+        started = time.perf_counter()
+        IN_PROGRESS.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            IN_PROGRESS.dec()
+            _queries.reset(token)
+        self._record(request, response, started, count)
+        return response
+
+    async def __acall__(self, request):
+        count = _QueryCount()
+        token = _queries.set(count)
+        started = time.perf_counter()
+        IN_PROGRESS.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            IN_PROGRESS.dec()
+            _queries.reset(token)
+        self._record(request, response, started, count)
+        return response
+
+
+def _may_read_metrics(request):
+    # Fails closed: per-endpoint traffic and pool internals are not public.
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if hmac.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode()):
+            return True
+    elif settings.DEBUG:
+        return True
+    # REMOTE_ADDR, not X-Forwarded-For, which any client can set.
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def metrics_view(request):
+    if not _may_read_metrics(request):
+        return HttpResponseForbidden()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,87 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from ninja import Field, Schema
+from ninja.errors import HttpError
+from ninja.pagination import AsyncPaginationBase
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    raw = json.dumps([created_at.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, ValueError, TypeError):
+        raise HttpError(400, 'Invalid cursor')
+
+
+class CursorPagination(AsyncPaginationBase):
+    """Keyset pagination over ``(created_at, id)``; never issues an OFFSET.
+
+    ``on_empty_page(**view_params)`` runs only when a page comes back empty,
+    so a parent-existence check costs nothing on the common path. For async
+    views it should be a coroutine function.
+    """
+
+    class Input(Schema):
+        cursor: Optional[str] = None
+        limit: int = Field(settings.API_PAGE_SIZE, ge=1)
+
+    class Output(Schema):
+        items: List[Any]
+        next_cursor: Optional[str] = None
+
+    def __init__(self, descending: bool = True, on_empty_page=None, **kwargs: Any) -> None:
+        self.descending = descending
+        self.on_empty_page = on_empty_page
+        super().__init__(**kwargs)
+
+    def _page_queryset(self, queryset: QuerySet, pagination: Input) -> QuerySet:
+        limit = min(pagination.limit, settings.API_MAX_PAGE_SIZE)
+        if self.descending:
+            queryset = queryset.order_by('-created_at', '-id')
+        else:
+            queryset = queryset.order_by('created_at', 'id')
+
+        if pagination.cursor:
+            created_at, pk = decode_cursor(pagination.cursor)
+            op = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'created_at__{op}': created_at})
+                | Q(created_at=created_at, **{f'id__{op}': pk})
+            )
+        return queryset[:limit + 1]
+
+    def _page(self, items: list, pagination: Input) -> Any:
+        limit = min(pagination.limit, settings.API_MAX_PAGE_SIZE)
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            if isinstance(last, dict):
+                next_cursor = encode_cursor(last['created_at'], last['id'])
+            else:
+                next_cursor = encode_cursor(last.created_at, last.id)
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def paginate_queryset(self, queryset: QuerySet, pagination: Input, **params: Any) -> Any:
+        items = list(self._page_queryset(queryset, pagination))
+        if not items and self.on_empty_page is not None:
+            self.on_empty_page(**params)
+        return self._page(items, pagination)
+
+    async def apaginate_queryset(self, queryset: QuerySet, pagination: Input, **params: Any) -> Any:
+        items = [item async for item in self._page_queryset(queryset, pagination)]
+        if not items and self.on_empty_page is not None:
+            await self.on_empty_page(**params)
+        return self._page(items, pagination)
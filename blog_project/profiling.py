@@ -0,0 +1,189 @@
+import cProfile
+import io
+import logging
+import pstats
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from ninja.operation import Operation
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.queries = Counter()
+        self.statements = Counter()
+
+    def record_query(self, sql, params, elapsed):
+        self.db_time += elapsed
+        self.statements[sql] += 1
+        self.queries[(sql, repr(params))] += 1
+
+    @property
+    def query_count(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicate_queries(self):
+        """Queries repeated with identical SQL and parameters."""
+        return sum(count - 1 for count in self.queries.values())
+
+    @property
+    def repeated_statements(self):
+        """Extra executions of the same SQL with different parameters (the N+1 shape)."""
+        return sum(count - 1 for count in self.statements.values()) - self.duplicate_queries
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, params, time.perf_counter() - started)
+
+
+def _install_query_recorder(connection, **kwargs):
+    # Connections are per thread (and per async context), so the recorder is
+    # attached to each one and finds the current request through a ContextVar,
+    # which sync_to_async carries into the ORM's worker thread.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _timed_result_to_response(original):
+    def _result_to_response(self, request, result, temporal_response):
+        profile = _current.get()
+        if profile is None:
+            return original(self, request, result, temporal_response)
+        started = time.perf_counter()
+        try:
+            return original(self, request, result, temporal_response)
+        finally:
+            profile.serialize_time += time.perf_counter() - started
+    _result_to_response.profiled = True
+    return _result_to_response
+
+
+def instrument():
+    """Record queries on every connection and time Ninja response-schema serialization."""
+    connection_created.connect(_install_query_recorder, dispatch_uid='request_profiling')
+    for connection in connections.all(initialized_only=True):
+        _install_query_recorder(connection)
+    if not getattr(Operation._result_to_response, 'profiled', False):
+        Operation._result_to_response = _timed_result_to_response(Operation._result_to_response)
+
+
+def _logger_for(path):
+    if path.startswith('/api/articles/'):
+        return logging.getLogger('comments' if '/comments' in path else 'articles')
+    if path.startswith('/api/comments/'):
+        return logging.getLogger('comments')
+    if path.startswith(('/api/auth/', '/api/token/')):
+        return logging.getLogger('users')
+    return None
+
+
+class RequestProfilingMiddleware:
+    """Record wall, DB and serialization time and query counts for sampled requests.
+
+    Results go to a ``Server-Timing`` header and a log line on the app logger
+    that owns the path. Disabled entirely (removed from the chain) unless
+    ``REQUEST_PROFILING`` is set. Staff may add ``?profile=1`` to receive a
+    cProfile summary; for async views only the event-loop thread is profiled,
+    ORM work that runs in the sync thread pool shows up as DB time instead.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+        instrument()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _profile_requested(request):
+        return request.GET.get('profile') == '1'
+
+    def _start(self, request, cprofile):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        profiler = cProfile.Profile() if cprofile else None
+        if profiler:
+            profiler.enable()
+        return profile, token, profiler, time.perf_counter()
+
+    def _finish(self, request, response, state):
+        profile, token, profiler, started = state
+        if profiler:
+            profiler.disable()
+        total = time.perf_counter() - started
+        _current.reset(token)
+
+        if profiler:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(40)
+            response = HttpResponse(out.getvalue(), content_type='text/plain; charset=utf-8')
+
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(profile.db_time * 1000, 2),
+            'queries': profile.query_count,
+            'duplicate_queries': profile.duplicate_queries,
+            'repeated_statements': profile.repeated_statements,
+            'serialize_ms': round(profile.serialize_time * 1000, 2),
+        }
+        response['Server-Timing'] = ', '.join((
+            f"total;dur={fields['total_ms']}",
+            f"db;dur={fields['db_ms']};desc=\"{fields['queries']} queries, {fields['duplicate_queries']} duplicate\"",
+            f"serialize;dur={fields['serialize_ms']}",
+        ))
+
+        logger = _logger_for(request.path)
+        if logger is not None:
+            level = logging.WARNING if profile.duplicate_queries else logging.INFO
+            logger.log(
+                level,
+                ' '.join(f'{key}={value}' for key, value in fields.items()),
+                extra={'event': 'request_profile', 'profile': fields},
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        cprofile = self._profile_requested(request) and request.user.is_staff
+        if not cprofile and random.random() >= self.sample_rate:
+            return self.get_response(request)
+        state = self._start(request, cprofile)
+        response = self.get_response(request)
+        return self._finish(request, response, state)
+
+    async def __acall__(self, request):
+        cprofile = self._profile_requested(request) and (await request.auser()).is_staff
+        if not cprofile and random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        state = self._start(request, cprofile)
+        response = await self.get_response(request)
+        return self._finish(request, response, state)
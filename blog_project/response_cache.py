@@ -0,0 +1,192 @@
+import hashlib
+import inspect
+import time
+from contextvars import ContextVar
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from blog_project.db_router import areplica_result_cacheable, record_write, replica_result_cacheable
+
+# Generations read while building a cache key: the response depends on writes to them.
+_generations_read = ContextVar('response_cache_generations', default=None)
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+async def generation(name):
+    """Current version stamp for a family of keys (e.g. every page of a list)."""
+    read = _generations_read.get()
+    if read is not None:
+        read.append(f'gen:{name}')
+    cache = get_cache()
+    key = f'api:gen:{name}'
+    value = await cache.aget(key)
+    if value is None:
+        value = time.time_ns()
+        await cache.aadd(key, value, None)
+        value = await cache.aget(key, value)
+    return value
+
+
+def bump_generation(*names):
+    # A fresh timestamp rather than incr(): if the counter is evicted we must not
+    # fall back to a value that old entries were stored under.
+    get_cache().set_many({f'api:gen:{name}': time.time_ns() for name in names}, None)
+    record_write(*(f'gen:{name}' for name in names))
+
+
+def invalidate(*keys):
+    get_cache().delete_many(keys)
+    record_write(*keys)
+
+
+def query_fingerprint(request):
+    return hashlib.md5(urlencode(sorted(request.GET.items())).encode()).hexdigest()
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _is_conditional(request):
+    return 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+
+
+def _not_modified(request, etags, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        accepted = parse_etags(if_none_match)
+        return if_none_match.strip() == '*' or any(etag and etag in accepted for etag in etags)
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return bool(last_modified and if_modified_since and int(last_modified) <= if_modified_since)
+
+
+def _apply_validators(response, etag, last_modified):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _entry(response):
+    return response.content, response['Content-Type'], '"%s"' % hashlib.md5(response.content).hexdigest()
+
+
+def _finish(request, response, body_etag, etag=None, last_modified=None):
+    # The client may hold the body's ETag (plain GETs) or the validator's (conditional GETs);
+    # either one proves it has this representation.
+    if _not_modified(request, (etag, body_etag), last_modified):
+        response = HttpResponseNotModified()
+    return _apply_validators(response, etag or body_etag, last_modified)
+
+
+def _cached(request, entry, validator_func):
+    """Whether a cache hit can be answered without consulting the validators."""
+    return validator_func is None or not _is_conditional(request) or _not_modified(request, (entry[2],), None)
+
+
+def _call(func, *args, **kwargs):
+    if inspect.iscoroutinefunction(func):
+        return async_to_sync(func)(*args, **kwargs)
+    return func(*args, **kwargs)
+
+
+async def _acall(func, *args, **kwargs):
+    result = func(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def cached_response(key_func, validator_func=None):
+    """Cache a read operation's serialized 200 response and answer conditional GETs.
+
+    Apply with ``ninja.decorators.decorate_view`` so it wraps the rendered
+    response; ``key_func(request, **path_params)`` returns the cache key.
+    Plain GETs get an ETag hashed from the body. Only conditional GETs call
+    ``validator_func(request, **path_params)``, which returns ``(etag,
+    last_modified)`` without rendering anything (from cache generations or a
+    primary-key lookup) so a cache miss can still answer 304; it returns None
+    when the object is missing. Either callback may be a coroutine function;
+    sync and async operations are both supported.
+    """
+    def decorator(run):
+        if inspect.iscoroutinefunction(run):
+            @wraps(run)
+            async def async_wrapper(request, *args, **kwargs):
+                enabled = settings.API_CACHE_TIMEOUT > 0
+                entry = None
+                if enabled:
+                    cache = get_cache()
+                    generations = []
+                    token = _generations_read.set(generations)
+                    try:
+                        key = await _acall(key_func, request, **kwargs)
+                    finally:
+                        _generations_read.reset(token)
+                    # A replica read for this key can only be stale after writes to these.
+                    scopes = [key, *generations]
+                    entry = await cache.aget(key)
+                    if entry is not None and _cached(request, entry, validator_func):
+                        return _finish(request, HttpResponse(entry[0], content_type=entry[1]), entry[2])
+
+                etag = last_modified = None
+                if validator_func is not None and _is_conditional(request):
+                    etag, last_modified = await _acall(validator_func, request, **kwargs) or (None, None)
+                    if etag and _not_modified(request, (etag,), last_modified):
+                        return _apply_validators(HttpResponseNotModified(), etag, last_modified)
+                if entry is not None:
+                    return _finish(request, HttpResponse(entry[0], content_type=entry[1]), entry[2], etag, last_modified)
+
+                response = await run(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                entry = _entry(response)
+                if enabled and await areplica_result_cacheable(scopes):
+                    await cache.aset(key, entry, settings.API_CACHE_TIMEOUT)
+                return _finish(request, response, entry[2], etag, last_modified)
+            return async_wrapper
+
+        @wraps(run)
+        def wrapper(request, *args, **kwargs):
+            enabled = settings.API_CACHE_TIMEOUT > 0
+            entry = None
+            if enabled:
+                cache = get_cache()
+                generations = []
+                token = _generations_read.set(generations)
+                try:
+                    key = _call(key_func, request, **kwargs)
+                finally:
+                    _generations_read.reset(token)
+                scopes = [key, *generations]
+                entry = cache.get(key)
+                if entry is not None and _cached(request, entry, validator_func):
+                    return _finish(request, HttpResponse(entry[0], content_type=entry[1]), entry[2])
+
+            etag = last_modified = None
+            if validator_func is not None and _is_conditional(request):
+                etag, last_modified = _call(validator_func, request, **kwargs) or (None, None)
+                if etag and _not_modified(request, (etag,), last_modified):
+                    return _apply_validators(HttpResponseNotModified(), etag, last_modified)
+            if entry is not None:
+                return _finish(request, HttpResponse(entry[0], content_type=entry[1]), entry[2], etag, last_modified)
+
+            response = run(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = _entry(response)
+            if enabled and replica_result_cacheable(scopes):
+                cache.set(key, entry, settings.API_CACHE_TIMEOUT)
+            return _finish(request, response, entry[2], etag, last_modified)
+        return wrapper
+    return decorator
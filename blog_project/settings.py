@@ -26,15 +26,20 @@ INSTALLED_APPS = [
     'categories',
     'articles',
     'comments',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
+    'blog_project.log.RequestLogContextMiddleware',
+    'blog_project.metrics.MetricsMiddleware',
+    'blog_project.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog_project.profiling.RequestProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -66,9 +71,57 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', ''),
         'PORT': os.environ.get('DB_PORT', ''),
+        # Seconds to keep a connection open between requests (0 closes it after
+        # every request). Under ASGI prefer DB_POOL: each request may run its ORM
+        # calls on a different thread, so persistent connections pile up.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('true', '1', 'yes'),
+        'OPTIONS': {},
     }
 }
 
+# psycopg 3 connection pool (PostgreSQL only), one per worker process; requires DB_CONN_MAX_AGE=0.
+if os.environ.get('DB_POOL', 'False').lower() in ('true', '1', 'yes'):
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    }
+
+# Read replicas: comma-separated hosts (PostgreSQL) or database files (SQLite), each
+# otherwise configured like default. Only views marked with read_from_replica use them.
+DATABASE_REPLICAS = []
+for _number, _location in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    _replica = {**DATABASES['default'], 'OPTIONS': dict(DATABASES['default']['OPTIONS']), 'TEST': {'MIRROR': 'default'}}
+    _replica['NAME' if _replica['ENGINE'].endswith('sqlite3') else 'HOST'] = _location.strip()
+    DATABASES[f'replica{_number}'] = _replica
+    DATABASE_REPLICAS.append(f'replica{_number}')
+
+DATABASE_ROUTERS = ['blog_project.db_router.ReplicaRouter']
+
+# After a client writes, its reads stay on the primary (and replica reads are not
+# cached) for this many seconds; keep it above the worst expected replication lag.
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '5'))
+
+# Password hashing: argon2 (default), scrypt or pbkdf2. Hashes made by the other two still
+# verify and are re-hashed with the chosen one on the next successful login.
+_PASSWORD_HASHERS = {
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+# Threads that hash passwords for login/register, off the event loop.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 2)))
+
+# Auth rate limits as "N/period" (s, m, h, d); empty disables. Login limits count failures only.
+AUTH_LOGIN_FAILURES_PER_IP = os.environ.get('AUTH_LOGIN_FAILURES_PER_IP', '20/m')
+AUTH_LOGIN_FAILURES_PER_USERNAME = os.environ.get('AUTH_LOGIN_FAILURES_PER_USERNAME', '5/m')
+AUTH_REGISTRATIONS_PER_IP = os.environ.get('AUTH_REGISTRATIONS_PER_IP', '20/h')
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -87,13 +140,71 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Pagination
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', '20'))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', '100'))
+API_EXCERPT_LENGTH = int(os.environ.get('API_EXCERPT_LENGTH', '200'))
+API_BULK_MAX_ITEMS = int(os.environ.get('API_BULK_MAX_ITEMS', '500'))
+
+# Rows fetched per database round trip (and per streamed chunk) by the NDJSON exports.
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+
+# Admin: unfiltered changelists of tables at least this large show the planner's row
+# estimate (PostgreSQL) instead of running COUNT(*); inlines show this many recent rows.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', '100000'))
+ADMIN_INLINE_MAX_ROWS = int(os.environ.get('ADMIN_INLINE_MAX_ROWS', '20'))
+
+# Auth tokens: lifetime in seconds (0 disables expiry) and active tokens kept per user (0 = no cap)
+AUTH_TOKEN_TTL = int(os.environ.get('AUTH_TOKEN_TTL', str(60 * 60 * 24 * 30)))
+AUTH_TOKEN_MAX_PER_USER = int(os.environ.get('AUTH_TOKEN_MAX_PER_USER', '10'))
+
+# Caches: local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) for multi-worker deployments.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Cached public API responses; a timeout of 0 disables the response cache.
+API_CACHE_ALIAS = os.environ.get('API_CACHE_ALIAS', 'default')
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', '300'))
+
+# Token auth cache (per process)
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', '10000'))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', '60'))
+
+# Request profiling: Server-Timing headers and a log line for a sample of requests;
+# staff can add ?profile=1 to get a cProfile summary instead of the response body.
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', 'False').lower() in ('true', '1', 'yes')
+REQUEST_PROFILING_SAMPLE_RATE = float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', '1.0'))
+
+# Prometheus metrics at /api/metrics. With METRICS_TOKEN set, scrapers send "Authorization: Bearer <token>";
+# otherwise only staff sessions, METRICS_ALLOWED_IPS (e.g. the Prometheus host) and DEBUG may read it.
+# Under several gunicorn workers also set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py).
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+
 # Ninja JWT
 NINJA_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
-# Logging
+# Logging: records go through a bounded in-memory queue to a background thread per
+# worker, so a slow stdout never blocks requests (overflow is dropped and counted in
+# log_records_dropped_total). LOG_FORMAT is json or text; LOG_SAMPLE_RATES keeps a share
+# of high-volume INFO events, e.g. "article_created=0.1,comment_created=0.1".
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+LOG_SAMPLE_RATES = {
+    event.strip(): float(rate)
+    for event, _, rate in (
+        item.partition('=') for item in os.environ.get('LOG_SAMPLE_RATES', '').split(',') if item.strip()
+    )
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -102,11 +213,25 @@ LOGGING = {
             'format': '{levelname} {asctime} {name} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'blog_project.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sampling': {
+            '()': 'blog_project.log.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+        'request_context': {
+            '()': 'blog_project.log.RequestContextFilter',
+        },
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            '()': 'blog_project.log.AsyncQueueHandler',
+            'maxsize': LOG_QUEUE_SIZE,
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+            'filters': ['sampling', 'request_context'],
         },
     },
     'loggers': {
@@ -0,0 +1,302 @@
+import json
+import logging
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from prometheus_client import REGISTRY
+
+from articles.cache import article_detail_key
+from articles.models import Article
+from blog_project import db_router, profiling
+from blog_project.db_router import ReplicaRouter, RoutingState
+from blog_project.log import AsyncQueueHandler, JsonFormatter, RequestContextFilter, SamplingFilter
+from users.models import AuthToken
+
+
+@override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_SAMPLE_RATE=1.0, API_CACHE_TIMEOUT=0)
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        # The test connection was opened before any middleware was loaded.
+        profiling.instrument()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.article = Article.objects.create(title='Test', content='Body', author=self.user)
+
+    def test_server_timing_and_log_fields(self):
+        with self.assertLogs('articles', level='INFO') as logs:
+            response = self.client.get(f'/api/articles/{self.article.id}')
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn('serialize;dur=', timing)
+        record = logs.records[-1]
+        self.assertEqual(record.profile['queries'], 1)
+        self.assertEqual(record.profile['duplicate_queries'], 0)
+        self.assertGreater(record.profile['serialize_ms'], 0)
+
+    async def test_async_request_is_profiled(self):
+        response = await AsyncClient().get('/api/articles/')
+        self.assertIn('1 queries', response['Server-Timing'])
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=0.0)
+    def test_unsampled_request_has_no_header(self):
+        response = self.client.get(f'/api/articles/{self.article.id}')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_profile_dump_requires_staff(self):
+        self.client.force_login(self.user)
+        response = self.client.get(f'/api/articles/{self.article.id}?profile=1')
+        self.assertEqual(response['Content-Type'], 'application/json; charset=utf-8')
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(f'/api/articles/{self.article.id}?profile=1')
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn('function calls', response.content.decode())
+
+
+class RequestProfilingDisabledTests(TestCase):
+    def test_middleware_is_skipped(self):
+        response = Client().get('/api/articles/')
+        self.assertNotIn('Server-Timing', response)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.article = Article.objects.create(title='Test', content='Body', author=self.user)
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    @override_settings(API_CACHE_TIMEOUT=0)
+    def test_requests_are_counted_per_operation(self):
+        labels = {'operation': 'get_article', 'method': 'GET', 'status': '200'}
+        before = self.sample('api_requests_total', **labels)
+        queries_before = self.sample('api_request_db_queries_sum', operation='get_article')
+        self.client.get(f'/api/articles/{self.article.id}')
+        self.assertEqual(self.sample('api_requests_total', **labels), before + 1)
+        self.assertEqual(self.sample('api_request_db_queries_sum', operation='get_article'), queries_before + 1)
+
+    def test_methods_on_one_path_are_told_apart(self):
+        before = self.sample('api_requests_total', operation='create_article', method='POST', status='401')
+        self.client.post('/api/articles/', data='{}', content_type='application/json')
+        self.assertEqual(
+            self.sample('api_requests_total', operation='create_article', method='POST', status='401'),
+            before + 1,
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_metrics_endpoint(self):
+        self.client.get('/api/articles/')
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('api_request_duration_seconds_bucket{le="0.005",operation="list_articles"}', body)
+        self.assertIn('auth_token_cache_lookups_total', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_token(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+        response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='', METRICS_ALLOWED_IPS=[])
+    def test_metrics_endpoint_closed_by_default(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get('/api/metrics').status_code, 200)
+
+    @override_settings(DEBUG=False, METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_metrics_endpoint_allowed_ip(self):
+        self.assertEqual(self.client.get('/api/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+        self.assertEqual(self.client.get('/api/metrics', HTTP_X_FORWARDED_FOR='10.0.0.5').status_code, 403)
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def route(self, pinned=False, replica_ok=True):
+        state = RoutingState(pinned=pinned)
+        state.replica_ok = replica_ok
+        token = db_router._state.set(state)
+        self.addCleanup(db_router._state.reset, token)
+        return state
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_reads_outside_marked_views_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Article), 'default')
+        self.route(replica_ok=False)
+        self.assertEqual(self.router.db_for_read(Article), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_marked_views_read_replica_until_they_write(self):
+        state = self.route()
+        self.assertEqual(self.router.db_for_read(Article), 'replica1')
+        self.assertTrue(state.used_replica)
+        self.assertEqual(self.router.db_for_write(Article), 'default')
+        self.assertEqual(self.router.db_for_read(Article), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_pinned_request_reads_primary(self):
+        self.route(pinned=True)
+        self.assertEqual(self.router.db_for_read(Article), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_replicas_are_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'articles'))
+        self.assertTrue(self.router.allow_migrate('default', 'articles'))
+
+
+# 'default' doubles as the replica so the queries have somewhere to go.
+@override_settings(DATABASE_REPLICAS=['default'], API_CACHE_TIMEOUT=0)
+class ReplicaRoutingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.auth = f'Bearer {self.token.key}'
+        self.article = Article.objects.create(title='Test', content='Body', author=self.user)
+
+    def replica_reads(self, *args, **kwargs):
+        with mock.patch.object(db_router.random, 'choice', wraps=db_router.random.choice) as choice:
+            response = self.client.get(*args, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return choice.call_count
+
+    def test_anonymous_reads_go_to_replica(self):
+        self.assertGreater(self.replica_reads('/api/articles/'), 0)
+        self.assertGreater(self.replica_reads(f'/api/articles/{self.article.id}'), 0)
+        self.assertEqual(self.replica_reads('/api/articles/search', {'q': 'Test'}), 0)
+
+    def test_client_is_pinned_to_primary_after_write(self):
+        self.assertGreater(self.replica_reads('/api/articles/', HTTP_AUTHORIZATION=self.auth), 0)
+        response = self.client.post(
+            '/api/articles/', data=json.dumps({'title': 'New', 'content': 'Body'}),
+            content_type='application/json', HTTP_AUTHORIZATION=self.auth,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.replica_reads('/api/articles/', HTTP_AUTHORIZATION=self.auth), 0)
+        self.assertGreater(self.replica_reads('/api/articles/'), 0)
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.replica_reads('/api/articles/')
+        return len(queries)
+
+    @override_settings(API_CACHE_TIMEOUT=300)
+    def test_replica_reads_are_not_cached_right_after_a_write(self):
+        self.client.post(
+            '/api/articles/', data=json.dumps({'title': 'New', 'content': 'Body'}),
+            content_type='application/json', HTTP_AUTHORIZATION=self.auth,
+        )
+        self.list_queries()
+        self.assertGreater(self.list_queries(), 0)
+
+    @override_settings(API_CACHE_TIMEOUT=300)
+    def test_writes_to_other_articles_do_not_block_caching(self):
+        other = Article.objects.create(title='Other', content='Body', author=self.user)
+        cache.clear()  # forget setUp's write to self.article
+        self.client.put(
+            f'/api/articles/{other.id}', data=json.dumps({'title': 'Edited'}),
+            content_type='application/json', HTTP_AUTHORIZATION=self.auth,
+        )
+        self.replica_reads(f'/api/articles/{self.article.id}')
+        self.assertIsNotNone(cache.get(article_detail_key(None, self.article.id)))
+
+    @override_settings(API_CACHE_TIMEOUT=300)
+    def test_writes_that_invalidate_nothing_do_not_block_caching(self):
+        cache.clear()
+        # Logging in writes a token, which no cached response depends on.
+        self.client.post(
+            '/api/auth/login', data=json.dumps({'username': 'testuser', 'password': 'pass'}),
+            content_type='application/json',
+        )
+        self.list_queries()
+        self.assertEqual(self.list_queries(), 0)
+
+
+class StructuredLoggingTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+
+    def capture(self, **filters):
+        stream = StringIO()
+        handler = AsyncQueueHandler(maxsize=100, stream=stream)
+        handler.setFormatter(JsonFormatter())
+        handler.addFilter(RequestContextFilter())
+        for f in filters.values():
+            handler.addFilter(f)
+        logger = logging.getLogger('articles')
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        return handler, stream
+
+    def create_article(self):
+        return self.client.post(
+            '/api/articles/', data=json.dumps({'title': 'New', 'content': 'Body'}),
+            content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+            HTTP_X_REQUEST_ID='req-1',
+        )
+
+    def test_records_are_json_with_request_context(self):
+        handler, stream = self.capture()
+        article_id = self.create_article().json()['id']
+        handler.stop()
+        record = json.loads(stream.getvalue().splitlines()[-1])
+        self.assertEqual(record['event'], 'article_created')
+        self.assertEqual(record['article_id'], article_id)
+        self.assertEqual(record['user_id'], self.user.id)
+        self.assertEqual(record['request_id'], 'req-1')
+        self.assertEqual(record['path'], '/api/articles/')
+        self.assertIn('elapsed_ms', record)
+        self.assertEqual(record['message'], "Article 'New' created by user 'testuser'")
+
+    def test_sampling_drops_info_events_only(self):
+        sampling = SamplingFilter({'article_created': 0.0, 'article_delete_denied': 0.0})
+        handler, stream = self.capture(sampling=sampling)
+        article_id = self.create_article().json()['id']
+        other = User.objects.create_user(username='other', password='pass')
+        self.client.delete(
+            f'/api/articles/{article_id}',
+            HTTP_AUTHORIZATION=f'Bearer {AuthToken.objects.create(user=other).key}',
+        )
+        handler.stop()
+        events = [json.loads(line)['event'] for line in stream.getvalue().splitlines()]
+        self.assertEqual(events, ['article_delete_denied'])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        release = threading.Event()
+
+        class BlockingStream(StringIO):
+            def write(self, text):
+                release.wait(5)
+                return super().write(text)
+
+        handler = AsyncQueueHandler(maxsize=1, stream=BlockingStream())
+        logger = logging.getLogger('blog_project.tests.log')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for n in range(5):
+                logger.warning('record %d', n)
+            self.assertGreaterEqual(handler.dropped, 3)
+        finally:
+            release.set()
+            handler.stop()
+            logger.removeHandler(handler)
@@ -6,16 +6,22 @@ from ninja_extra import NinjaExtraAPI
 
 from users.api import router as auth_router
 from articles.api import router as articles_router
-from comments.api import router as comments_router
+from comments.api import export_router as comments_export_router, router as comments_router
+from categories.api import router as categories_router
+from blog_project.metrics import metrics_view
+from blog_project.renderers import FastJSONRenderer
 
-api = NinjaExtraAPI(title='Blog API', version='1.0.0')
+api = NinjaExtraAPI(title='Blog API', version='1.0.0', renderer=FastJSONRenderer())
 api.register_controllers(NinjaJWTDefaultController)
 
 api.add_router('/auth', auth_router)
 api.add_router('/articles', articles_router)
 api.add_router('/articles', comments_router)
+api.add_router('/comments', comments_export_router)
+api.add_router('/categories', categories_router)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/metrics', metrics_view, name='metrics'),
     path('api/', api.urls),
 ]
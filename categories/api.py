@@ -0,0 +1,34 @@
+from typing import List
+
+from django.db.models import Count
+from django.shortcuts import aget_object_or_404
+from ninja import Router
+from ninja.decorators import decorate_view
+
+from blog_project.db_router import read_from_replica
+from blog_project.renderers import skip_response_validation
+from blog_project.response_cache import cached_response
+from categories.cache import category_detail_key, category_list_key
+from categories.models import Category
+from categories.schemas import CategoryOut
+
+router = Router(tags=['categories'])
+
+
+def _with_counts():
+    return Category.objects.annotate(article_count=Count('articles'))
+
+
+@router.get('/', response=List[CategoryOut])
+@skip_response_validation
+@decorate_view(read_from_replica)
+@decorate_view(cached_response(category_list_key))
+async def list_categories(request):
+    return [row async for row in _with_counts().order_by('name', 'id').values('id', 'name', 'slug', 'article_count')]
+
+
+@router.get('/{int:category_id}', response=CategoryOut)
+@decorate_view(read_from_replica)
+@decorate_view(cached_response(category_detail_key))
+async def get_category(request, category_id: int):
+    return await aget_object_or_404(_with_counts(), id=category_id)
@@ -0,0 +1,15 @@
+from blog_project.response_cache import bump_generation, generation, query_fingerprint
+
+
+# Category lists change rarely and the article counts are a GROUP BY, so
+# responses live until the next article/category write bumps the generation.
+async def category_list_key(request):
+    return f"api:categories:{await generation('categories')}:{query_fingerprint(request)}"
+
+
+async def category_detail_key(request, category_id):
+    return f"api:categories:{await generation('categories')}:{category_id}"
+
+
+def invalidate_categories():
+    bump_generation('categories')
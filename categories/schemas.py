@@ -0,0 +1,8 @@
+from ninja import Schema
+
+
+class CategoryOut(Schema):
+    id: int
+    name: str
+    slug: str
+    article_count: int
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from categories.cache import invalidate_categories
+from categories.models import Category
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def evict_categories(sender, instance, **kwargs):
+    invalidate_categories()
@@ -0,0 +1,119 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+
+from articles.models import Article
+from categories.models import Category
+from users.models import AuthToken
+
+
+class CategoryApiTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.python = Category.objects.create(name='Python', slug='python')
+        self.django = Category.objects.create(name='Django', slug='django')
+        self.article = Article.objects.create(title='A', content='Body', author=self.user, category=self.python)
+        Article.objects.create(title='B', content='Body', author=self.user, category=self.python)
+
+    def counts(self):
+        return {row['slug']: row['article_count'] for row in self.client.get('/api/categories/').json()}
+
+    def test_list_categories_with_counts(self):
+        response = self.client.get('/api/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.json()], ['Django', 'Python'])
+        self.assertEqual(self.counts(), {'django': 0, 'python': 2})
+
+    def test_list_served_from_cache(self):
+        self.client.get('/api/categories/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/categories/')
+
+    def test_get_category(self):
+        response = self.client.get(f'/api/categories/{self.python.id}')
+        self.assertEqual(response.json(), {'id': self.python.id, 'name': 'Python', 'slug': 'python', 'article_count': 2})
+        self.assertEqual(self.client.get('/api/categories/999').status_code, 404)
+
+    def test_article_writes_invalidate_counts(self):
+        self.counts()
+        Article.objects.create(title='C', content='Body', author=self.user, category=self.django)
+        self.assertEqual(self.counts(), {'django': 1, 'python': 2})
+
+        self.client.put(
+            f'/api/articles/{self.article.id}',
+            data=json.dumps({'category_id': self.django.id}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+        self.assertEqual(self.counts(), {'django': 2, 'python': 1})
+
+        self.client.post(
+            '/api/articles/bulk',
+            data=json.dumps([{'title': 'D', 'content': 'Body', 'category_id': self.python.id}]),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+        self.assertEqual(self.counts(), {'django': 2, 'python': 2})
+
+        self.article.delete()
+        self.assertEqual(self.counts(), {'django': 1, 'python': 2})
+
+    def test_category_writes_invalidate_list(self):
+        self.counts()
+        self.django.name = 'Web'
+        self.django.save()
+        self.python.delete()
+        self.assertEqual([row['name'] for row in self.client.get('/api/categories/').json()], ['Web'])
+
+
+class ArticleCategoryFilterTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.python = Category.objects.create(name='Python', slug='python')
+        self.article = Article.objects.create(title='In', content='Body', author=self.user, category=self.python)
+        Article.objects.create(title='Out', content='Body', author=self.user)
+
+    def titles(self, **params):
+        return [item['title'] for item in self.client.get('/api/articles/', params).json()['items']]
+
+    def test_filter_by_category_id(self):
+        self.assertEqual(self.titles(category=self.python.id), ['In'])
+        self.assertEqual(self.titles(category=999), [])
+
+    def test_filter_by_category_slug(self):
+        self.assertEqual(self.titles(category_slug='python'), ['In'])
+
+    def test_slug_change_invalidates_filtered_list(self):
+        self.assertEqual(self.titles(category_slug='py'), [])
+        self.python.slug = 'py'
+        self.python.save()
+        self.assertEqual(self.titles(category_slug='py'), ['In'])
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class ArticleCategoryConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.python = Category.objects.create(name='Python', slug='python')
+        Article.objects.create(title='In', content='Body', author=self.user, category=self.python)
+
+    def status(self, etag, **params):
+        return self.client.get('/api/articles/', params, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_slug_change_changes_filtered_list_etag(self):
+        etag = self.client.get('/api/articles/', {'category_slug': 'python'})['ETag']
+        self.assertEqual(self.status(etag, category_slug='python'), 304)
+        self.python.slug = 'py'
+        self.python.save()
+        self.assertEqual(self.status(etag, category_slug='python'), 200)
+
+    def test_category_delete_changes_filtered_list_etag(self):
+        category_id = self.python.id
+        etag = self.client.get('/api/articles/', {'category': category_id})['ETag']
+        self.python.delete()
+        self.assertEqual(self.status(etag, category=category_id), 200)
@@ -1,16 +1,24 @@
 from django.contrib import admin
 
+from blog_project.admin import ScalableAdminMixin
 from comments.models import Comment
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'author', 'article', 'short_text', 'created_at', 'updated_at')
-    list_filter = ('created_at', 'author')
+    list_select_related = ('author', 'article')
+    # No author filter: its sidebar would list every user. Search by username instead.
+    list_filter = ('created_at',)
     search_fields = ('text', 'author__username', 'article__title')
     readonly_fields = ('created_at', 'updated_at')
     raw_id_fields = ('author', 'article')
 
+    def get_queryset(self, request):
+        # Rows only show the article's title; don't drag every body along.
+        # list_select_related joins the article, so the deferral applies to the changelist.
+        return super().get_queryset(request).defer('article__content', 'article__search_vector')
+
     def short_text(self, obj):
         return obj.text[:60] + '...' if len(obj.text) > 60 else obj.text
     short_text.short_description = 'Text'
@@ -1,77 +1,258 @@
 import logging
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from django.shortcuts import get_object_or_404
+from django import db
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.utils import timezone
 from ninja import Router
+from ninja.decorators import decorate_view
+from ninja.pagination import paginate
 
 from articles.models import Article
+from blog_project.bulk import BulkDeleteIn, BulkResultOut, too_many
+from blog_project.db_router import read_from_replica
+from blog_project.export import NDJSON_DOCS, ndjson_response, updated_between
+from blog_project.pagination import CursorPagination
+from blog_project.renderers import skip_response_validation
+from blog_project.response_cache import bump_generation, cached_response, invalidate
+from comments.cache import (
+    comment_detail_key, comment_detail_validators, comment_list_key, comment_list_validators,
+    invalidate_comment,
+)
 from comments.models import Comment
-from comments.schemas import CommentIn, CommentOut, CommentUpdate
-from users.auth import TokenAuth
+from comments.schemas import CommentBulkUpdate, CommentIn, CommentOut, CommentUpdate
+from comments.signals import adjust_comment_count, suspend_comment_counters
+from users.auth import AsyncTokenAuth, TokenAuth
 from users.schemas import ErrorOut
 
 logger = logging.getLogger('comments')
 
 router = Router(tags=['comments'])
+# Mounted at /comments: the export spans every article.
+export_router = Router(tags=['comments'])
 
 
-@router.get('/{article_id}/comments', response=List[CommentOut])
-def list_comments(request, article_id: int):
-    get_object_or_404(Article, id=article_id)
-    return Comment.objects.select_related('author').filter(article_id=article_id)
+async def _ensure_article_exists(article_id, **params):
+    await aget_object_or_404(Article.objects.only('id'), id=article_id)
 
 
-@router.get('/{article_id}/comments/{comment_id}', response=CommentOut)
-def get_comment(request, article_id: int, comment_id: int):
-    return get_object_or_404(
+LIST_FIELDS = ('id', 'text', 'author_id', 'article_id', 'created_at', 'updated_at')
+
+
+@router.get('/{int:article_id}/comments', response=List[CommentOut])
+@skip_response_validation
+@decorate_view(read_from_replica)
+@decorate_view(cached_response(comment_list_key, comment_list_validators))
+@paginate(CursorPagination, descending=False, on_empty_page=_ensure_article_exists)
+async def list_comments(request, article_id: int, author_id: Optional[int] = None):
+    comments = Comment.objects.filter(article_id=article_id)
+    if author_id is not None:
+        comments = comments.filter(author_id=author_id)
+    return comments.values(*LIST_FIELDS, author_username=F('author__username'))
+
+
+@export_router.get('/export', response={403: ErrorOut}, auth=AsyncTokenAuth(), openapi_extra=NDJSON_DOCS)
+@decorate_view(read_from_replica)
+async def export_comments(
+    request, updated_after: Optional[datetime] = None, updated_before: Optional[datetime] = None,
+):
+    if not request.auth.is_staff:
+        return 403, {'detail': 'Only staff can export'}
+    comments = Comment.objects.values(*LIST_FIELDS, author_username=F('author__username'))
+    comments = updated_between(comments, updated_after, updated_before).using(db.router.db_for_read(Comment))
+    logger.info(
+        "Comments export started by user '%s'", request.auth.username,
+        extra={'event': 'comments_exported', 'user_id': request.auth.id},
+    )
+    return ndjson_response(request, comments, 'comments.ndjson')
+
+
+@router.get('/{int:article_id}/comments/{int:comment_id}', response=CommentOut)
+@decorate_view(read_from_replica)
+@decorate_view(cached_response(comment_detail_key, comment_detail_validators))
+async def get_comment(request, article_id: int, comment_id: int):
+    return await aget_object_or_404(
         Comment.objects.select_related('author'),
         id=comment_id,
         article_id=article_id,
     )
 
 
-@router.post('/{article_id}/comments', response={201: CommentOut}, auth=TokenAuth())
+@router.post('/{int:article_id}/comments', response={201: CommentOut}, auth=TokenAuth())
 def create_comment(request, article_id: int, payload: CommentIn):
     article = get_object_or_404(Article, id=article_id)
-    comment = Comment.objects.create(
-        text=payload.text,
-        author=request.auth,
-        article=article,
-    )
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            text=payload.text,
+            author=request.auth,
+            article=article,
+        )
     logger.info(
         "Comment %d created by user '%s' on article %d",
         comment.id, request.auth.username, article_id,
+        extra={'event': 'comment_created', 'user_id': request.auth.id, 'article_id': article_id,
+               'comment_id': comment.id},
     )
     return 201, comment
 
 
-@router.put('/{article_id}/comments/{comment_id}', response={200: CommentOut, 403: ErrorOut}, auth=TokenAuth())
+def _owner_username(article_id, comment_id):
+    """Called only after an owner-filtered write matched nothing: 404 if missing, else the owner."""
+    owner = (
+        Comment.objects.filter(id=comment_id, article_id=article_id)
+        .values_list('author__username', flat=True)
+        .first()
+    )
+    if owner is None:
+        raise Http404
+    return owner
+
+
+@router.put('/{int:article_id}/comments/{int:comment_id}', response={200: CommentOut, 403: ErrorOut}, auth=TokenAuth())
 def update_comment(request, article_id: int, comment_id: int, payload: CommentUpdate):
-    comment = get_object_or_404(Comment, id=comment_id, article_id=article_id)
-    if comment.author != request.auth:
+    updated = Comment.objects.filter(id=comment_id, article_id=article_id, author_id=request.auth.id).update(
+        updated_at=timezone.now(), **payload.dict(exclude_unset=True),
+    )
+    if not updated:
         logger.warning(
             "User '%s' tried to update comment %d owned by '%s'",
-            request.auth.username, comment_id, comment.author.username,
+            request.auth.username, comment_id, _owner_username(article_id, comment_id),
+            extra={'event': 'comment_update_denied', 'user_id': request.auth.id, 'article_id': article_id,
+                   'comment_id': comment_id},
         )
         return 403, {'detail': 'You can only edit your own comments'}
 
-    for attr, value in payload.dict(exclude_unset=True).items():
-        setattr(comment, attr, value)
-    comment.save()
-    logger.info("Comment %d updated by user '%s'", comment_id, request.auth.username)
-    return 200, comment
+    # A queryset update sends no post_save, so evict cached reads here.
+    invalidate_comment(article_id, comment_id)
+    logger.info(
+        "Comment %d updated by user '%s'", comment_id, request.auth.username,
+        extra={'event': 'comment_updated', 'user_id': request.auth.id, 'article_id': article_id,
+               'comment_id': comment_id},
+    )
+    return 200, Comment.objects.select_related('author').get(id=comment_id)
 
 
-@router.delete('/{article_id}/comments/{comment_id}', response={204: None, 403: ErrorOut}, auth=TokenAuth())
+@router.delete('/{int:article_id}/comments/{int:comment_id}', response={204: None, 403: ErrorOut}, auth=TokenAuth())
 def delete_comment(request, article_id: int, comment_id: int):
-    comment = get_object_or_404(Comment, id=comment_id, article_id=article_id)
-    if comment.author != request.auth:
+    with transaction.atomic():
+        deleted, _ = (
+            Comment.objects.filter(id=comment_id, article_id=article_id, author_id=request.auth.id)
+            .only('id', 'article')
+            .delete()
+        )
+    if not deleted:
         logger.warning(
             "User '%s' tried to delete comment %d owned by '%s'",
-            request.auth.username, comment_id, comment.author.username,
+            request.auth.username, comment_id, _owner_username(article_id, comment_id),
+            extra={'event': 'comment_delete_denied', 'user_id': request.auth.id, 'article_id': article_id,
+                   'comment_id': comment_id},
         )
         return 403, {'detail': 'You can only delete your own comments'}
 
-    comment.delete()
-    logger.info("Comment %d deleted by user '%s'", comment_id, request.auth.username)
+    logger.info(
+        "Comment %d deleted by user '%s'", comment_id, request.auth.username,
+        extra={'event': 'comment_deleted', 'user_id': request.auth.id, 'article_id': article_id,
+               'comment_id': comment_id},
+    )
     return 204, None
+
+
+def _evict(article_id, comment_ids):
+    invalidate(*(comment_detail_key(None, article_id, comment_id) for comment_id in comment_ids))
+    bump_generation(f'comments:{article_id}')
+
+
+@router.post('/{int:article_id}/comments/bulk', response={200: List[BulkResultOut], 400: ErrorOut}, auth=TokenAuth())
+def bulk_create_comments(request, article_id: int, payload: List[CommentIn]):
+    error = too_many(payload)
+    if error:
+        return error
+
+    get_object_or_404(Article.objects.only('id'), id=article_id)
+    comments = [Comment(text=item.text, author=request.auth, article_id=article_id) for item in payload]
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        adjust_comment_count(article_id, len(comments))
+    _evict(article_id, [comment.id for comment in comments])
+    logger.info(
+        "%d comments bulk-created by user '%s' on article %d",
+        len(comments), request.auth.username, article_id,
+        extra={'event': 'comments_bulk_created', 'user_id': request.auth.id, 'article_id': article_id,
+               'count': len(comments)},
+    )
+    return 200, [{'id': comment.id, 'status': 201} for comment in comments]
+
+
+@router.patch('/{int:article_id}/comments/bulk', response={200: List[BulkResultOut], 400: ErrorOut}, auth=TokenAuth())
+def bulk_update_comments(request, article_id: int, payload: List[CommentBulkUpdate]):
+    error = too_many(payload)
+    if error:
+        return error
+
+    existing = (
+        Comment.objects.filter(article_id=article_id)
+        .only('id', 'author', 'article')
+        .in_bulk([item.id for item in payload])
+    )
+    now = timezone.now()
+    results, changed = [], {}
+    for item in payload:
+        comment = existing.get(item.id)
+        if comment is None:
+            results.append({'id': item.id, 'status': 404, 'detail': 'Not found'})
+        elif comment.author_id != request.auth.id:
+            results.append({'id': item.id, 'status': 403, 'detail': 'You can only edit your own comments'})
+        else:
+            results.append({'id': item.id, 'status': 200})
+            if item.text is None:
+                continue
+            comment.text = item.text
+            comment.updated_at = now
+            changed[comment.id] = comment
+
+    with transaction.atomic():
+        Comment.objects.bulk_update(list(changed.values()), ['text', 'updated_at'])
+    _evict(article_id, changed)
+    logger.info(
+        "%d comments bulk-updated by user '%s' on article %d",
+        len(changed), request.auth.username, article_id,
+        extra={'event': 'comments_bulk_updated', 'user_id': request.auth.id, 'article_id': article_id,
+               'count': len(changed)},
+    )
+    return 200, results
+
+
+@router.delete('/{int:article_id}/comments/bulk', response={200: List[BulkResultOut], 400: ErrorOut}, auth=TokenAuth())
+def bulk_delete_comments(request, article_id: int, payload: BulkDeleteIn):
+    error = too_many(payload.ids)
+    if error:
+        return error
+
+    owners = dict(
+        Comment.objects.filter(article_id=article_id, id__in=payload.ids).values_list('id', 'author_id')
+    )
+    results, owned = [], set()
+    for comment_id in payload.ids:
+        if comment_id not in owners:
+            results.append({'id': comment_id, 'status': 404, 'detail': 'Not found'})
+        elif owners[comment_id] != request.auth.id:
+            results.append({'id': comment_id, 'status': 403, 'detail': 'You can only delete your own comments'})
+        else:
+            owned.add(comment_id)
+            results.append({'id': comment_id, 'status': 204})
+
+    with transaction.atomic():
+        with suspend_comment_counters():
+            Comment.objects.filter(id__in=owned).delete()
+        adjust_comment_count(article_id, -len(owned))
+    logger.info(
+        "%d comments bulk-deleted by user '%s' on article %d",
+        len(owned), request.auth.username, article_id,
+        extra={'event': 'comments_bulk_deleted', 'user_id': request.auth.id, 'article_id': article_id,
+               'count': len(owned)},
+    )
+    return 200, results
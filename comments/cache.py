@@ -0,0 +1,44 @@
+from blog_project.response_cache import (
+    bump_generation, generation, invalidate, make_etag, query_fingerprint,
+)
+from comments.models import Comment
+
+
+def comment_detail_key(request, article_id, comment_id):
+    return f'api:comment:{article_id}:{comment_id}'
+
+
+async def comment_list_key(request, article_id):
+    return f"api:comments:{article_id}:{await generation(f'comments:{article_id}')}:{query_fingerprint(request)}"
+
+
+async def comment_detail_validators(request, article_id, comment_id):
+    row = await (
+        Comment.objects.filter(id=comment_id, article_id=article_id)
+        .values_list('updated_at', 'author__username')
+        .afirst()
+    )
+    if row is None:
+        return None
+    updated_at, username = row
+    return make_etag('comment', comment_id, updated_at.isoformat(), username), updated_at.timestamp()
+
+
+async def comment_list_validators(request, article_id):
+    # Comment writes and the article's deletion bump comments:<article_id>; renames bump 'usernames'.
+    etag = make_etag(
+        'comments', article_id, await generation(f'comments:{article_id}'), await generation('usernames'),
+        query_fingerprint(request),
+    )
+    return etag, None
+
+
+def invalidate_comment(article_id, comment_id):
+    invalidate(comment_detail_key(None, article_id, comment_id))
+    bump_generation(f'comments:{article_id}')
+
+
+def invalidate_comments(pairs):
+    """Like ``invalidate_comment`` for many ``(article_id, comment_id)`` pairs at once."""
+    invalidate(*(comment_detail_key(None, article_id, comment_id) for article_id, comment_id in pairs))
+    bump_generation(*{f'comments:{article_id}' for article_id, _ in pairs})
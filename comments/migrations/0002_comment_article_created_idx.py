@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_backfill_comment_count'),
+        ('comments', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', 'created_at', 'id'], name='comment_article_created_idx'),
+        ),
+    ]
@@ -17,5 +17,11 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['article', 'created_at', 'id'], name='comment_article_created_idx'),
+            models.Index(fields=['updated_at'], name='comment_updated_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.article.title}"
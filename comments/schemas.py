@@ -24,3 +24,7 @@ class CommentOut(Schema):
 
 class CommentUpdate(Schema):
     text: Optional[str] = None
+
+
+class CommentBulkUpdate(CommentUpdate):
+    id: int
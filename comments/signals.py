@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from articles.cache import invalidate_articles
+from articles.models import Article
+from blog_project.response_cache import bump_generation
+from comments.cache import invalidate_comment, invalidate_comments
+from comments.models import Comment
+from users.signals import username_changed
+
+
+_counters_suspended = ContextVar('comment_counters_suspended', default=False)
+
+
+@contextmanager
+def suspend_comment_counters():
+    """Skip per-row comment_count updates; the caller adjusts the counters once for the whole batch."""
+    token = _counters_suspended.set(True)
+    try:
+        yield
+    finally:
+        _counters_suspended.reset(token)
+
+
+def adjust_comment_count(article_id, delta):
+    if not delta or _counters_suspended.get():
+        return
+    articles = Article.objects.filter(pk=article_id)
+    if delta < 0:
+        articles = articles.filter(comment_count__gte=-delta)
+    articles.update(comment_count=F('comment_count') + delta)
+    invalidate_articles(article_id)
+
+
+@receiver(pre_save, sender=Comment)
+def track_article_change(sender, instance, update_fields=None, **kwargs):
+    instance._previous_article_id = None
+    if instance.pk and (update_fields is None or 'article' in update_fields):
+        instance._previous_article_id = (
+            Comment.objects.filter(pk=instance.pk).values_list('article_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def evict_comment(sender, instance, created, **kwargs):
+    invalidate_comment(instance.article_id, instance.pk)
+    previous = getattr(instance, '_previous_article_id', None)
+    if created:
+        adjust_comment_count(instance.article_id, 1)
+    elif previous is not None and previous != instance.article_id:
+        # Moved to another article (admin): fix both counters and the old list.
+        adjust_comment_count(previous, -1)
+        adjust_comment_count(instance.article_id, 1)
+        invalidate_comment(previous, instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def evict_deleted_comment(sender, instance, **kwargs):
+    invalidate_comment(instance.article_id, instance.pk)
+    adjust_comment_count(instance.article_id, -1)
+
+
+@receiver(post_delete, sender=Article)
+def evict_article_comments(sender, instance, **kwargs):
+    # An empty comment list must turn into a 404 once its article is gone.
+    bump_generation(f'comments:{instance.pk}')
+
+
+@receiver(username_changed)
+def evict_author_comments(sender, instance, **kwargs):
+    invalidate_comments(list(instance.comments.values_list('article_id', 'id')))
@@ -1,10 +1,15 @@
 import json
+from io import StringIO
 
 from django.contrib.auth.models import User
-from django.test import TestCase, Client
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from articles.models import Article
 from comments.models import Comment
+from users.auth import TokenAuth
 from users.models import AuthToken
 
 
@@ -18,13 +23,48 @@ class CommentListTests(TestCase):
     def test_list_comments(self):
         response = self.client.get(f'/api/articles/{self.article.id}/comments')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(len(response.json()['items']), 1)
 
     def test_list_comments_wrong_article(self):
         response = self.client.get('/api/articles/9999/comments')
         self.assertEqual(response.status_code, 404)
 
 
+@override_settings(API_CACHE_TIMEOUT=0)
+class CommentPaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.other = User.objects.create_user(username='other', password='pass')
+        self.article = Article.objects.create(title='Art', content='Body', author=self.user)
+        for i in range(5):
+            Comment.objects.create(text=f'C{i}', author=self.user if i % 2 else self.other, article=self.article)
+
+    def test_cursor_walks_in_chronological_order(self):
+        base = f'/api/articles/{self.article.id}/comments?limit=2'
+        texts, url = [], base
+        while url:
+            data = self.client.get(url).json()
+            texts += [item['text'] for item in data['items']]
+            url = f"{base}&cursor={data['next_cursor']}" if data['next_cursor'] else None
+        self.assertEqual(texts, [f'C{i}' for i in range(5)])
+
+    def test_filter_by_author(self):
+        response = self.client.get(f'/api/articles/{self.article.id}/comments?author_id={self.user.id}')
+        self.assertEqual([item['text'] for item in response.json()['items']], ['C1', 'C3'])
+
+    def test_non_empty_page_skips_existence_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(f'/api/articles/{self.article.id}/comments?limit=2')
+        self.assertFalse(any('"articles_article"' in q['sql'] for q in ctx.captured_queries))
+
+    def test_empty_page_for_existing_article(self):
+        empty = Article.objects.create(title='Empty', content='Body', author=self.user)
+        response = self.client.get(f'/api/articles/{empty.id}/comments')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'], [])
+
+
 class CommentDetailTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -126,3 +166,237 @@ class CommentDeleteTests(TestCase):
             HTTP_AUTHORIZATION=f'Bearer {self.other_token.key}',
         )
         self.assertEqual(response.status_code, 403)
+
+
+class CommentCacheTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.article = Article.objects.create(title='Art', content='Body', author=self.user)
+
+    def test_create_invalidates_list(self):
+        self.assertEqual(len(self.client.get(f'/api/articles/{self.article.id}/comments').json()['items']), 0)
+        self.client.post(
+            f'/api/articles/{self.article.id}/comments',
+            data=json.dumps({'text': 'First'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+        self.assertEqual(len(self.client.get(f'/api/articles/{self.article.id}/comments').json()['items']), 1)
+
+    def test_article_delete_invalidates_empty_list(self):
+        self.client.get(f'/api/articles/{self.article.id}/comments')
+        article_id = self.article.id
+        self.article.delete()
+        self.assertEqual(self.client.get(f'/api/articles/{article_id}/comments').status_code, 404)
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class CommentConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.article = Article.objects.create(title='Art', content='Body', author=self.user)
+        self.comment = Comment.objects.create(text='Nice', author=self.user, article=self.article)
+
+    def test_detail_not_modified(self):
+        url = f'/api/articles/{self.article.id}/comments/{self.comment.id}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_list_modified_after_update(self):
+        url = f'/api/articles/{self.article.id}/comments'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.comment.text = 'Edited'
+        self.comment.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class CommentCountTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.article = Article.objects.create(title='Art', content='Body', author=self.user)
+
+    def count(self):
+        return Article.objects.get(pk=self.article.pk).comment_count
+
+    def test_create_and_delete_maintain_count(self):
+        response = self.client.post(
+            f'/api/articles/{self.article.id}/comments',
+            data=json.dumps({'text': 'One'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+        self.assertEqual(self.count(), 1)
+        self.assertEqual(self.client.get(f'/api/articles/{self.article.id}').json()['comment_count'], 1)
+        self.client.delete(
+            f"/api/articles/{self.article.id}/comments/{response.json()['id']}",
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+        self.assertEqual(self.count(), 0)
+
+    def test_cascade_delete_maintains_count(self):
+        commenter = User.objects.create_user(username='commenter', password='pass')
+        Comment.objects.create(text='Bye', author=commenter, article=self.article)
+        Comment.objects.create(text='Stay', author=self.user, article=self.article)
+        commenter.delete()
+        self.assertEqual(self.count(), 1)
+
+    def test_article_save_keeps_count(self):
+        Comment.objects.create(text='One', author=self.user, article=self.article)
+        self.article.title = 'Renamed'
+        self.article.save()
+        self.assertEqual(self.count(), 1)
+
+    def test_recount_comments_repairs_drift(self):
+        Comment.objects.create(text='One', author=self.user, article=self.article)
+        Article.objects.update(comment_count=7)
+        out = StringIO()
+        call_command('recount_comments', stdout=out)
+        self.assertIn('Fixed comment_count on 1', out.getvalue())
+        self.assertEqual(self.count(), 1)
+
+
+class CommentBulkTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='owner', password='pass')
+        self.other = User.objects.create_user(username='other', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.article = Article.objects.create(title='Art', content='Body', author=self.user)
+        self.mine = Comment.objects.create(text='Mine', author=self.user, article=self.article)
+        self.theirs = Comment.objects.create(text='Theirs', author=self.other, article=self.article)
+
+    def send(self, method, data):
+        return getattr(self.client, method)(
+            f'/api/articles/{self.article.id}/comments/bulk',
+            data=json.dumps(data),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+
+    def count(self):
+        return Article.objects.get(pk=self.article.pk).comment_count
+
+    def test_bulk_create_updates_count(self):
+        response = self.send('post', [{'text': 'A'}, {'text': 'B'}])
+        self.assertEqual([r['status'] for r in response.json()], [201, 201])
+        self.assertEqual(self.count(), 4)
+        listed = self.client.get(f'/api/articles/{self.article.id}/comments').json()['items']
+        self.assertEqual(len(listed), 4)
+
+    def test_bulk_update_checks_ownership(self):
+        response = self.send('patch', [{'id': self.mine.id, 'text': 'Edited'}, {'id': self.theirs.id, 'text': 'Hack'}])
+        self.assertEqual([r['status'] for r in response.json()], [200, 403])
+        self.assertEqual(Comment.objects.get(id=self.mine.id).text, 'Edited')
+        self.assertEqual(Comment.objects.get(id=self.theirs.id).text, 'Theirs')
+
+    def test_bulk_update_skips_items_without_text(self):
+        untouched = Comment.objects.create(text='Untouched', author=self.user, article=self.article)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.send('patch', [{'id': self.mine.id, 'text': 'Edited'}, {'id': untouched.id}])
+        self.assertEqual([r['status'] for r in response.json()], [200, 200])
+        selects = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'comments_comment' in q['sql']]
+        self.assertEqual(len(selects), 1)
+        untouched_after = Comment.objects.get(id=untouched.id)
+        self.assertEqual((untouched_after.text, untouched_after.updated_at), ('Untouched', untouched.updated_at))
+
+    def test_bulk_delete_updates_count(self):
+        response = self.send('delete', {'ids': [self.mine.id, self.theirs.id, 9999]})
+        self.assertEqual([r['status'] for r in response.json()], [204, 403, 404])
+        self.assertEqual(self.count(), 1)
+
+
+class CommentWriteQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='owner', password='pass')
+        self.other = User.objects.create_user(username='other', password='pass')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.other_token = AuthToken.objects.create(user=self.other)
+        self.article = Article.objects.create(title='Art', content='Body', author=self.user)
+        self.comment = Comment.objects.create(text='Old', author=self.user, article=self.article)
+        self.url = f'/api/articles/{self.article.id}/comments/{self.comment.id}'
+        # Warm the token cache so only the handler's own queries are counted.
+        TokenAuth().authenticate(None, self.token.key)
+        TokenAuth().authenticate(None, self.other_token.key)
+
+    def put(self, token):
+        return self.client.put(
+            self.url,
+            data=json.dumps({'text': 'Updated'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token.key}',
+        )
+
+    def test_update_own_comment_queries(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.put(self.token).status_code, 200)
+
+    def test_update_other_comment_queries(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.put(self.other_token).status_code, 403)
+
+    def test_delete_other_comment_queries(self):
+        # SAVEPOINT/RELEASE around the owner-filtered delete, then the owner lookup.
+        with self.assertNumQueries(4):
+            response = self.client.delete(self.url, HTTP_AUTHORIZATION=f'Bearer {self.other_token.key}')
+        self.assertEqual(response.status_code, 403)
+
+    def test_delete_missing_comment_is_404(self):
+        response = self.client.delete(
+            f'/api/articles/{self.article.id}/comments/9999',
+            HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class CommentAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        for i in range(count):
+            author = User.objects.create_user(username=f'author{User.objects.count()}', password='pass')
+            article = Article.objects.create(title=f'A{i}', content='Body', author=author)
+            Comment.objects.create(text='Hi', author=author, article=article)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_rows(2)
+        self.client.get('/admin/comments/comment/')  # Warm the content type cache.
+        with CaptureQueriesContext(connection) as before:
+            self.client.get('/admin/comments/comment/')
+        self.add_rows(10)
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get('/admin/comments/comment/')
+        self.assertContains(response, 'A9')
+        self.assertEqual(len(after), len(before))
+        self.assertFalse(any('"articles_article"."content"' in q['sql'] for q in after))
+
+    def test_change_view(self):
+        self.add_rows(1)
+        comment = Comment.objects.get()
+        self.assertEqual(self.client.get(f'/admin/comments/comment/{comment.id}/change/').status_code, 200)
+
+
+class CommentExportTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='pass', is_staff=True)
+        self.token = AuthToken.objects.create(user=self.staff)
+        article = Article.objects.create(title='Test', content='Body', author=self.staff)
+        Comment.objects.bulk_create([Comment(text=f'Comment {i}', author=self.staff, article=article) for i in range(3)])
+
+    async def test_streams_comments(self):
+        response = await AsyncClient().get(
+            '/api/comments/export', headers={'Authorization': f'Bearer {self.token.key}'},
+        )
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['text'] for row in rows], ['Comment 0', 'Comment 1', 'Comment 2'])
+        self.assertEqual(rows[0]['author_username'], 'staff')
@@ -2,36 +2,71 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 
-from users.models import AuthToken
+from blog_project.admin import RecentInlineFormSet, ScalableAdminMixin
+from users.models import AuthToken, token_expiry_cutoff
 
 
 class ArticleInline(admin.TabularInline):
     from articles.models import Article
     model = Article
+    formset = RecentInlineFormSet
+    verbose_name_plural = 'recent articles'
     fields = ('title', 'category', 'created_at')
     readonly_fields = ('created_at',)
     extra = 0
     show_change_link = True
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('content', 'search_vector').order_by('-created_at', '-id')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'category':
+            # Evaluate the choices once for the page, not once per row.
+            formfield.choices = list(formfield.choices)
+        return formfield
+
 
 class CommentInline(admin.TabularInline):
     from comments.models import Comment
     model = Comment
+    formset = RecentInlineFormSet
+    verbose_name_plural = 'recent comments'
     fields = ('article', 'text', 'created_at')
-    readonly_fields = ('created_at',)
+    # Editable, this would be a select (or a raw id lookup) of articles in every row.
+    readonly_fields = ('article', 'created_at')
     extra = 0
     show_change_link = True
 
+    def get_queryset(self, request):
+        # Comment.__str__ (the row titles) reads author and article.
+        return (
+            super().get_queryset(request)
+            .select_related('author', 'article')
+            .defer('article__content', 'article__search_vector')
+            .order_by('-created_at', '-id')
+        )
+
 
 class AuthTokenInline(admin.TabularInline):
     model = AuthToken
-    fields = ('key', 'created_at')
-    readonly_fields = ('key', 'created_at')
+    formset = RecentInlineFormSet
+    fields = ('digest', 'created_at')
+    readonly_fields = ('digest', 'created_at')
     extra = 0
     can_delete = True
 
+    def get_queryset(self, request):
+        # Expired tokens are waiting for prune_tokens; only list the live (capped) set.
+        # select_related: the row titles (AuthToken.__str__) read the user.
+        qs = super().get_queryset(request).select_related('user').order_by('-created_at')
+        cutoff = token_expiry_cutoff()
+        if cutoff is not None:
+            qs = qs.filter(created_at__gt=cutoff)
+        return qs
+
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(ScalableAdminMixin, UserAdmin):
     inlines = [ArticleInline, CommentInline, AuthTokenInline]
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'date_joined')
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'date_joined')
@@ -42,12 +77,13 @@ admin.site.register(User, CustomUserAdmin)
 
 
 @admin.register(AuthToken)
-class AuthTokenAdmin(admin.ModelAdmin):
-    list_display = ('user', 'short_key', 'created_at')
+class AuthTokenAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'short_digest', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('user__username',)
-    readonly_fields = ('key', 'created_at')
+    readonly_fields = ('digest', 'created_at')
     raw_id_fields = ('user',)
 
-    def short_key(self, obj):
-        return obj.key[:32] + '...'
-    short_key.short_description = 'Token (preview)'
+    def short_digest(self, obj):
+        return obj.digest[:16] + '...'
+    short_digest.short_description = 'Digest (preview)'
@@ -1,47 +1,88 @@
 import logging
 
-from django.contrib.auth import authenticate
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.http import HttpResponse
 from ninja import Router
 
-from users.auth import TokenAuth
-from users.models import AuthToken
+from users.auth import AsyncTokenAuth
+from users.models import AuthToken, hash_token
+from users.passwords import aauthenticate, amake_password
 from users.schemas import ErrorOut, LoginIn, MessageOut, RegisterIn, TokenOut
+from users.throttling import client_ip, login_failures_by_ip, login_failures_by_username, registrations_by_ip
 
 logger = logging.getLogger('users')
 
 router = Router(tags=['auth'])
 
 
-@router.post('/register', response={201: TokenOut, 400: ErrorOut})
-def register(request, payload: RegisterIn):
-    if User.objects.filter(username=payload.username).exists():
-        logger.warning("Registration failed: username '%s' already exists", payload.username)
+def _too_many_attempts(response, limiter):
+    response['Retry-After'] = str(limiter.window)
+    return 429, {'detail': 'Too many attempts, try again later'}
+
+
+@router.post('/register', response={201: TokenOut, 400: ErrorOut, 429: ErrorOut})
+async def register(request, payload: RegisterIn, response: HttpResponse):
+    ip = client_ip(request)
+    if await registrations_by_ip.ablocked(ip):
+        return _too_many_attempts(response, registrations_by_ip)
+    await registrations_by_ip.ahit(ip)
+
+    if await User.objects.filter(username=payload.username).aexists():
+        logger.warning(
+            "Registration failed: username '%s' already exists", payload.username,
+            extra={'event': 'register_failed'},
+        )
         return 400, {'detail': 'Username already exists'}
 
-    user = User.objects.create_user(username=payload.username, password=payload.password)
-    token = AuthToken.objects.create(user=user)
-    logger.info("User '%s' registered successfully", user.username)
+    user = User(username=User.normalize_username(payload.username))
+    user.password = await amake_password(payload.password)
+    try:
+        await user.asave(force_insert=True)
+    except IntegrityError:
+        return 400, {'detail': 'Username already exists'}
+    token = await AuthToken.objects.acreate(user=user)
+    logger.info(
+        "User '%s' registered successfully", user.username,
+        extra={'event': 'user_registered', 'user_id': user.id},
+    )
     return 201, {'token': token.key, 'username': user.username}
 
 
-@router.post('/login', response={200: TokenOut, 401: ErrorOut})
-def login(request, payload: LoginIn):
-    user = authenticate(username=payload.username, password=payload.password)
+@router.post('/login', response={200: TokenOut, 401: ErrorOut, 429: ErrorOut})
+async def login(request, payload: LoginIn, response: HttpResponse):
+    # Refuse before hashing: blocked attempts cost one cache read each.
+    ip, username = client_ip(request), payload.username.lower()
+    for limiter, ident in ((login_failures_by_ip, ip), (login_failures_by_username, username)):
+        if await limiter.ablocked(ident):
+            logger.warning(
+                "Login throttled for username '%s'", payload.username,
+                extra={'event': 'login_throttled', 'scope': limiter.scope},
+            )
+            return _too_many_attempts(response, limiter)
+
+    user = await aauthenticate(request, payload.username, payload.password)
     if user is None:
-        logger.warning("Login failed for username '%s'", payload.username)
+        await login_failures_by_ip.ahit(ip)
+        await login_failures_by_username.ahit(username)
+        logger.warning("Login failed for username '%s'", payload.username, extra={'event': 'login_failed'})
         return 401, {'detail': 'Invalid credentials'}
 
-    token = AuthToken.objects.create(user=user)
-    logger.info("User '%s' logged in", user.username)
+    await login_failures_by_username.areset(username)
+    token = await AuthToken.objects.acreate(user=user)
+    await sync_to_async(AuthToken.trim_for_user)(user)
+    logger.info("User '%s' logged in", user.username, extra={'event': 'user_logged_in', 'user_id': user.id})
     return 200, {'token': token.key, 'username': user.username}
 
 
-@router.post('/logout', response={200: MessageOut}, auth=TokenAuth())
-def logout(request):
-    token_key = request.auth  # This is the user from TokenAuth
+@router.post('/logout', response={200: MessageOut}, auth=AsyncTokenAuth())
+async def logout(request):
     # Delete the token used in this request
     bearer = request.headers.get('Authorization', '').replace('Bearer ', '')
-    AuthToken.objects.filter(key=bearer).delete()
-    logger.info("User '%s' logged out", request.auth.username)
+    await AuthToken.objects.filter(digest=hash_token(bearer)).adelete()
+    logger.info(
+        "User '%s' logged out", request.auth.username,
+        extra={'event': 'user_logged_out', 'user_id': request.auth.id},
+    )
     return 200, {'detail': 'Logged out successfully'}
@@ -1,12 +1,52 @@
 from ninja.security import HttpBearer
 
-from users.models import AuthToken
+from users.models import AuthToken, hash_token, token_expiry_cutoff
+from users.token_cache import token_cache
+
+
+def _live_tokens():
+    tokens = AuthToken.objects.select_related('user')
+    cutoff = token_expiry_cutoff()
+    if cutoff is not None:
+        tokens = tokens.filter(created_at__gt=cutoff)
+    return tokens, cutoff
+
+
+def _remember(digest, auth_token, cutoff):
+    ttl = None
+    if cutoff is not None:
+        ttl = (auth_token.created_at - cutoff).total_seconds()
+    token_cache.set(digest, auth_token.user, ttl=ttl)
+    return auth_token.user
 
 
 class TokenAuth(HttpBearer):
     def authenticate(self, request, token: str):
+        digest = hash_token(token)
+        user = token_cache.get(digest)
+        if user is not None:
+            return user
+        tokens, cutoff = _live_tokens()
+        try:
+            auth_token = tokens.get(digest=digest)
+        except AuthToken.DoesNotExist:
+            return None
+        return _remember(digest, auth_token, cutoff)
+
+
+class AsyncTokenAuth(HttpBearer):
+    """TokenAuth for async operations; the lookup goes through the async ORM."""
+
+    is_async = True
+
+    async def authenticate(self, request, token: str):
+        digest = hash_token(token)
+        user = token_cache.get(digest)
+        if user is not None:
+            return user
+        tokens, cutoff = _live_tokens()
         try:
-            auth_token = AuthToken.objects.select_related('user').get(key=token)
-            return auth_token.user
+            auth_token = await tokens.aget(digest=digest)
         except AuthToken.DoesNotExist:
             return None
+        return _remember(digest, auth_token, cutoff)
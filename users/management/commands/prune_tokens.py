@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import AuthToken, token_expiry_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Delete expired auth tokens in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = token_expiry_cutoff()
+        if cutoff is None:
+            self.stdout.write('AUTH_TOKEN_TTL is disabled; nothing to prune.')
+            return
+
+        batch_size = options['batch_size']
+        total = 0
+        while True:
+            # One short transaction per batch keeps locks and WAL bounded.
+            with transaction.atomic():
+                ids = list(
+                    AuthToken.objects.filter(created_at__lte=cutoff)
+                    .order_by('created_at')
+                    .values_list('id', flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                AuthToken.objects.filter(id__in=ids).delete()
+            total += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f'Pruned {total} expired token(s).'))
@@ -0,0 +1,29 @@
+import hashlib
+
+from django.db import migrations
+
+
+def hash_existing_tokens(apps, schema_editor):
+    AuthToken = apps.get_model('users', 'AuthToken')
+    tokens = AuthToken.objects.filter(digest__isnull=True).only('id', 'key')
+    batch = []
+    for token in tokens.iterator(chunk_size=1000):
+        token.digest = hashlib.sha256(token.key.encode()).hexdigest()
+        batch.append(token)
+        if len(batch) >= 1000:
+            AuthToken.objects.bulk_update(batch, ['digest'])
+            batch = []
+    if batch:
+        AuthToken.objects.bulk_update(batch, ['digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_authtoken_digest'),
+    ]
+
+    operations = [
+        # Raw keys cannot be recovered from digests, so this is one-way.
+        migrations.RunPython(hash_existing_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_hash_existing_tokens'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='authtoken',
+            name='key',
+        ),
+        migrations.AlterField(
+            model_name='authtoken',
+            name='digest',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_remove_authtoken_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='authtoken',
+            index=models.Index(fields=['created_at'], name='authtoken_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authtoken',
+            index=models.Index(fields=['user', '-created_at'], name='authtoken_user_created_idx'),
+        ),
+    ]
@@ -1,7 +1,21 @@
+import hashlib
 import secrets
+from datetime import timedelta
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+def hash_token(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def token_expiry_cutoff():
+    """Tokens created before the returned moment are expired; None if tokens never expire."""
+    if settings.AUTH_TOKEN_TTL <= 0:
+        return None
+    return timezone.now() - timedelta(seconds=settings.AUTH_TOKEN_TTL)
 
 
 class AuthToken(models.Model):
@@ -10,13 +24,36 @@ class AuthToken(models.Model):
         on_delete=models.CASCADE,
         related_name='auth_tokens',
     )
-    key = models.CharField(max_length=256, unique=True, db_index=True)
+    # Only the SHA-256 digest is stored; the raw key is available on the
+    # instance right after creation so it can be handed to the client once.
+    digest = models.CharField(max_length=64, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    key = None
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='authtoken_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='authtoken_user_created_idx'),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.key:
+        if not self.digest:
             self.key = secrets.token_hex(128)
+            self.digest = hash_token(self.key)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def trim_for_user(cls, user):
+        """Delete the user's oldest tokens beyond AUTH_TOKEN_MAX_PER_USER."""
+        cap = settings.AUTH_TOKEN_MAX_PER_USER
+        if cap <= 0:
+            return
+        stale = list(
+            cls.objects.filter(user=user).order_by('-created_at', '-id').values_list('id', flat=True)[cap:]
+        )
+        if stale:
+            cls.objects.filter(id__in=stale).delete()
+
     def __str__(self):
         return f"Token for {self.user.username}"
@@ -0,0 +1,89 @@
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import load_backend
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+
+# Hashers release the GIL, so a small dedicated pool hashes in parallel without
+# occupying the event loop or the thread that serves sync ORM calls. Its size
+# also caps how many CPUs a burst of logins can take.
+_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+def _check(password, encoded):
+    if not check_password(password, encoded):
+        return False, False
+    preferred = get_hasher('default')
+    must_update = identify_hasher(encoded).algorithm != preferred.algorithm or preferred.must_update(encoded)
+    return True, must_update
+
+
+async def amake_password(password):
+    return await _run(make_password, password)
+
+
+def make_passwords(passwords):
+    """Hash many plaintext passwords in parallel on the password pool (for bulk imports)."""
+    return list(_executor.map(make_password, passwords))
+
+
+async def acheck_password(user, password):
+    """Verify ``password`` off the event loop; upgrade the stored hash to the preferred hasher."""
+    valid, must_update = await _run(_check, password, user.password)
+    if valid and must_update:
+        user.password = await amake_password(password)
+        await user.asave(update_fields=['password'])
+    return valid
+
+
+async def _amodel_authenticate(backend, username, password):
+    try:
+        user = await User._default_manager.aget(**{User.USERNAME_FIELD: username})
+    except User.DoesNotExist:
+        user = None
+    if user is None or not backend.user_can_authenticate(user):
+        # Hash anyway so response time doesn't reveal which usernames exist; an
+        # inactive user's hash is never checked, so never upgraded either.
+        await amake_password(password)
+        return None
+    return user if await acheck_password(user, password) else None
+
+
+async def aauthenticate(request, username, password):
+    """Async ``authenticate()`` that does ModelBackend's hashing in the password pool.
+
+    Walks ``AUTHENTICATION_BACKENDS`` like Django does; backends with their own
+    ``authenticate()`` run through ``sync_to_async``. Sends ``user_login_failed``
+    when none accepts the credentials.
+    """
+    for path in settings.AUTHENTICATION_BACKENDS:
+        backend = load_backend(path)
+        try:
+            inspect.signature(backend.authenticate).bind(request, username=username, password=password)
+        except TypeError:
+            continue
+        try:
+            if type(backend).authenticate is ModelBackend.authenticate:
+                user = await _amodel_authenticate(backend, username, password)
+            else:
+                user = await sync_to_async(backend.authenticate)(request, username=username, password=password)
+        except PermissionDenied:
+            break
+        if user is not None:
+            user.backend = path
+            return user
+    user_login_failed.send(
+        sender=__name__, credentials={'username': username, 'password': '********************'}, request=request,
+    )
+    return None
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from blog_project.response_cache import bump_generation
+from users.models import AuthToken
+from users.token_cache import token_cache
+
+# Sent with ``instance`` and ``previous`` (the old username) after a rename is saved;
+# apps whose cached responses embed author_username evict them.
+username_changed = Signal()
+
+
+@receiver(post_delete, sender=AuthToken)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.delete(instance.digest)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def track_username_change(sender, instance, update_fields=None, **kwargs):
+    instance._previous_username = None
+    if instance.pk and (update_fields is None or 'username' in update_fields):
+        instance._previous_username = (
+            sender.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def evict_changed_user(sender, instance, created, **kwargs):
+    if not created:
+        token_cache.delete_user(instance.pk)
+    previous = getattr(instance, '_previous_username', None)
+    if previous is not None and previous != instance.username:
+        # List ETags include this generation instead of every author's name.
+        bump_generation('usernames')
+        username_changed.send(sender=sender, instance=instance, previous=previous)
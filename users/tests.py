@@ -1,7 +1,24 @@
 import json
+from datetime import timedelta
+from io import StringIO
 
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from django.test import TestCase, Client
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from articles.models import Article
+from categories.models import Category
+from comments.models import Comment
+from users.auth import AsyncTokenAuth, TokenAuth
+from users.models import AuthToken, hash_token
+from users.token_cache import token_cache
 
 
 class RegisterTests(TestCase):
@@ -55,6 +72,127 @@ class LoginTests(TestCase):
         self.assertEqual(response.status_code, 401)
 
 
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+
+    def login(self, password='testpass123'):
+        return self.client.post(
+            '/api/auth/login',
+            data=json.dumps({'username': 'testuser', 'password': password}),
+            content_type='application/json',
+        )
+
+    def test_register_hashes_with_preferred_hasher(self):
+        self.client.post(
+            '/api/auth/register',
+            data=json.dumps({'username': 'newuser', 'password': 'testpass123'}),
+            content_type='application/json',
+        )
+        self.assertTrue(User.objects.get(username='newuser').password.startswith('argon2'))
+
+    def test_login_rehashes_legacy_hash(self):
+        user = User.objects.create(username='testuser', password=make_password('testpass123', hasher='pbkdf2_sha256'))
+        self.assertEqual(self.login().status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('argon2'))
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_failed_login_keeps_hash(self):
+        encoded = make_password('testpass123', hasher='pbkdf2_sha256')
+        User.objects.create(username='testuser', password=encoded)
+        self.assertEqual(self.login('wrong').status_code, 401)
+        self.assertEqual(User.objects.get(username='testuser').password, encoded)
+
+    def test_inactive_user_cannot_login(self):
+        User.objects.create_user(username='testuser', password='testpass123', is_active=False)
+        self.assertEqual(self.login().status_code, 401)
+
+    def test_inactive_user_hash_is_not_upgraded(self):
+        encoded = make_password('testpass123', hasher='pbkdf2_sha256')
+        User.objects.create(username='testuser', password=encoded, is_active=False)
+        self.assertEqual(self.login().status_code, 401)
+        self.assertEqual(User.objects.get(username='testuser').password, encoded)
+
+    def test_failed_login_sends_signal(self):
+        User.objects.create_user(username='testuser', password='testpass123')
+        received = []
+        handler = lambda sender, credentials, **kwargs: received.append(credentials)  # noqa: E731
+        user_login_failed.connect(handler)
+        self.addCleanup(user_login_failed.disconnect, handler)
+        self.login('wrong')
+        self.assertEqual(received, [{'username': 'testuser', 'password': '********************'}])
+
+    @override_settings(AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.AllowAllUsersModelBackend'])
+    def test_respects_authentication_backends(self):
+        User.objects.create_user(username='testuser', password='testpass123', is_active=False)
+        self.assertEqual(self.login().status_code, 200)
+
+
+class AuthRateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        User.objects.create_user(username='testuser', password='testpass123')
+
+    def login(self, password, username='testuser', **extra):
+        return self.client.post(
+            '/api/auth/login',
+            data=json.dumps({'username': username, 'password': password}),
+            content_type='application/json',
+            **extra,
+        )
+
+    @override_settings(AUTH_LOGIN_FAILURES_PER_USERNAME='2/m')
+    def test_repeated_failures_block_username(self):
+        self.assertEqual(self.login('wrong').status_code, 401)
+        self.assertEqual(self.login('wrong', username='TestUser').status_code, 401)
+        response = self.login('testpass123', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+    @override_settings(AUTH_LOGIN_FAILURES_PER_USERNAME='2/m')
+    def test_success_resets_username_failures(self):
+        self.assertEqual(self.login('wrong').status_code, 401)
+        self.assertEqual(self.login('testpass123').status_code, 200)
+        self.assertEqual(self.login('wrong').status_code, 401)
+        self.assertEqual(self.login('testpass123').status_code, 200)
+
+    @override_settings(AUTH_LOGIN_FAILURES_PER_IP='2/m', AUTH_LOGIN_FAILURES_PER_USERNAME='')
+    def test_failures_across_usernames_block_ip(self):
+        self.assertEqual(self.login('wrong', username='a').status_code, 401)
+        self.assertEqual(self.login('wrong', username='b').status_code, 401)
+        self.assertEqual(self.login('testpass123').status_code, 429)
+        self.assertEqual(self.login('testpass123', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    @override_settings(AUTH_LOGIN_FAILURES_PER_IP='2/m', AUTH_LOGIN_FAILURES_PER_USERNAME='')
+    def test_rotating_forwarded_for_does_not_reset_ip_limit(self):
+        self.assertEqual(self.login('wrong', HTTP_X_FORWARDED_FOR='203.0.113.1').status_code, 401)
+        self.assertEqual(self.login('wrong', HTTP_X_FORWARDED_FOR='203.0.113.2').status_code, 401)
+        self.assertEqual(self.login('testpass123', HTTP_X_FORWARDED_FOR='203.0.113.3').status_code, 429)
+
+    @override_settings(
+        AUTH_LOGIN_FAILURES_PER_IP='2/m', AUTH_LOGIN_FAILURES_PER_USERNAME='', NINJA_NUM_PROXIES=1,
+    )
+    def test_forwarded_for_is_trusted_behind_proxies(self):
+        self.assertEqual(self.login('wrong', HTTP_X_FORWARDED_FOR='203.0.113.1').status_code, 401)
+        self.assertEqual(self.login('wrong', HTTP_X_FORWARDED_FOR='203.0.113.1').status_code, 401)
+        self.assertEqual(self.login('testpass123', HTTP_X_FORWARDED_FOR='203.0.113.2').status_code, 200)
+
+    @override_settings(AUTH_REGISTRATIONS_PER_IP='1/h')
+    def test_registrations_per_ip(self):
+        def register(username):
+            return self.client.post(
+                '/api/auth/register',
+                data=json.dumps({'username': username, 'password': 'testpass123'}),
+                content_type='application/json',
+            ).status_code
+
+        self.assertEqual(register('first'), 201)
+        self.assertEqual(register('second'), 429)
+        self.assertFalse(User.objects.filter(username='second').exists())
+
+
 class LogoutTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -76,3 +214,156 @@ class LogoutTests(TestCase):
     def test_logout_without_token(self):
         response = self.client.post('/api/auth/logout')
         self.assertEqual(response.status_code, 401)
+
+
+class TokenAuthCacheTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.token = AuthToken.objects.create(user=self.user)
+
+    def test_repeat_lookup_served_from_cache(self):
+        auth = TokenAuth()
+        with self.assertNumQueries(1):
+            self.assertEqual(auth.authenticate(None, self.token.key), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(auth.authenticate(None, self.token.key), self.user)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+
+    def test_lookups_are_exported_as_metrics(self):
+        before = REGISTRY.get_sample_value('auth_token_cache_lookups_total', {'result': 'hit'}) or 0
+        token_cache.set(self.token.digest, self.user)
+        token_cache.get(self.token.digest)
+        after = REGISTRY.get_sample_value('auth_token_cache_lookups_total', {'result': 'hit'})
+        self.assertEqual(after, before + 1)
+
+    def test_logout_evicts_token(self):
+        auth = f'Bearer {self.token.key}'
+        self.assertEqual(self.client.post('/api/auth/logout', HTTP_AUTHORIZATION=auth).status_code, 200)
+        self.assertEqual(self.client.post('/api/auth/logout', HTTP_AUTHORIZATION=auth).status_code, 401)
+
+    def test_token_deletion_evicts_token(self):
+        token_cache.set(self.token.digest, self.user)
+        self.token.delete()
+        self.assertIsNone(token_cache.get(self.token.digest))
+
+    def test_only_digest_is_stored(self):
+        stored = AuthToken.objects.get(pk=self.token.pk)
+        self.assertIsNone(stored.key)
+        self.assertEqual(stored.digest, hash_token(self.token.key))
+
+
+class UsernameChangeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='old', password='pass')
+        self.article = Article.objects.create(title='Art', content='Body', author=self.user)
+        self.comment = Comment.objects.create(text='Nice', author=self.user, article=self.article)
+        self.urls = [
+            f'/api/articles/{self.article.id}',
+            f'/api/articles/{self.article.id}/comments/{self.comment.id}',
+        ]
+        self.list_urls = ['/api/articles/', f'/api/articles/{self.article.id}/comments']
+
+    def test_rename_evicts_cached_responses(self):
+        for url in self.urls + self.list_urls:
+            self.client.get(url)
+        self.user.username = 'new'
+        self.user.save()
+        for url in self.urls:
+            self.assertEqual(self.client.get(url).json()['author_username'], 'new')
+        for url in self.list_urls:
+            self.assertEqual(self.client.get(url).json()['items'][0]['author_username'], 'new')
+
+    @override_settings(API_CACHE_TIMEOUT=0)
+    def test_rename_changes_etags(self):
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls + self.list_urls}
+        self.user.username = 'new'
+        self.user.save()
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200, url)
+
+    def test_other_saves_do_not_look_up_the_username(self):
+        self.user.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=['last_login'])
+
+
+@override_settings(AUTH_TOKEN_TTL=3600, AUTH_TOKEN_MAX_PER_USER=2)
+class TokenExpiryTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.token = AuthToken.objects.create(user=self.user)
+        self.expired = AuthToken.objects.create(user=self.user)
+        AuthToken.objects.filter(pk=self.expired.pk).update(created_at=timezone.now() - timedelta(hours=2))
+
+    def test_expired_token_rejected(self):
+        self.assertEqual(TokenAuth().authenticate(None, self.token.key), self.user)
+        self.assertIsNone(TokenAuth().authenticate(None, self.expired.key))
+
+    def test_prune_tokens_deletes_only_expired(self):
+        out = StringIO()
+        call_command('prune_tokens', '--batch-size=1', stdout=out)
+        self.assertIn('Pruned 1', out.getvalue())
+        self.assertEqual(list(AuthToken.objects.values_list('pk', flat=True)), [self.token.pk])
+
+    def test_login_caps_active_tokens(self):
+        for _ in range(3):
+            self.client.post(
+                '/api/auth/login',
+                data=json.dumps({'username': 'testuser', 'password': 'testpass123'}),
+                content_type='application/json',
+            )
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 2)
+
+
+class AsyncTokenAuthTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.token = AuthToken.objects.create(user=self.user)
+
+    async def test_async_lookup(self):
+        auth = AsyncTokenAuth()
+        self.assertEqual(await auth.authenticate(None, self.token.key), self.user)
+        self.assertIsNone(await auth.authenticate(None, 'missing'))
+        self.assertEqual(token_cache.stats()['hits'], 0)
+        self.assertEqual(await auth.authenticate(None, self.token.key), self.user)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+
+
+class UserAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.category = Category.objects.create(name='Python', slug='python')
+
+    def add_rows(self, count):
+        for i in range(count):
+            article = Article.objects.create(title=f'A{i}', content='Body', author=self.admin, category=self.category)
+            Comment.objects.create(text='Hi', author=self.admin, article=article)
+            AuthToken.objects.create(user=self.admin)
+
+    def change_page_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/admin/auth/user/{self.admin.id}/change/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_change_page_queries_bounded(self):
+        with self.settings(ADMIN_INLINE_MAX_ROWS=3, AUTH_TOKEN_MAX_PER_USER=0):
+            self.add_rows(3)
+            self.change_page_queries()  # Warm the content type cache.
+            before, _ = self.change_page_queries()
+            self.add_rows(10)
+            after, response = self.change_page_queries()
+        self.assertEqual(after, before)
+        self.assertContains(response, 'name="articles-INITIAL_FORMS" value="3"')
+        self.assertContains(response, 'name="comments-INITIAL_FORMS" value="3"')
+        self.assertContains(response, 'name="auth_tokens-INITIAL_FORMS" value="3"')
@@ -0,0 +1,79 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def client_ip(request):
+    """Client address for rate limiting.
+
+    ``REMOTE_ADDR`` unless ``NINJA_NUM_PROXIES`` says how many trusted proxies
+    append to ``X-Forwarded-For``; the header alone can be set by any client.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    num_proxies = getattr(settings, 'NINJA_NUM_PROXIES', None)
+    xff = request.META.get('HTTP_X_FORWARDED_FOR')
+    if not num_proxies or not xff:
+        return remote_addr
+    addrs = [addr.strip() for addr in xff.split(',')]
+    return addrs[-min(num_proxies, len(addrs))]
+
+
+class AttemptLimiter:
+    """Fixed-window attempt counter in the default Django cache.
+
+    Limits are per process with the default ``LocMemCache``; set
+    ``CACHE_BACKEND`` to a shared cache (Redis, Memcached) so that all
+    workers count against the same window.
+
+    ``setting`` names a rate such as ``'5/m'`` ("N per s/m/h/d"); an empty
+    value disables the limiter. Read on every call so it can be changed in
+    tests and benchmarks.
+    """
+
+    def __init__(self, scope, setting):
+        self.scope = scope
+        self.setting = setting
+
+    def _rate(self):
+        rate = getattr(settings, self.setting)
+        if not rate:
+            return None, None
+        count, period = rate.split('/')
+        return int(count), _PERIODS[period[0]]
+
+    def _key(self, ident):
+        return f'throttle:{self.scope}:' + hashlib.sha256(ident.encode()).hexdigest()
+
+    @property
+    def window(self):
+        return self._rate()[1] or 0
+
+    async def ablocked(self, ident):
+        limit, _ = self._rate()
+        if limit is None:
+            return False
+        return (await cache.aget(self._key(ident), 0)) >= limit
+
+    async def ahit(self, ident):
+        limit, window = self._rate()
+        if limit is None:
+            return
+        key = self._key(ident)
+        if not await cache.aadd(key, 1, window):
+            try:
+                await cache.aincr(key)
+            except ValueError:
+                # Expired between add() and incr().
+                await cache.aset(key, 1, window)
+
+    async def areset(self, ident):
+        await cache.adelete(self._key(ident))
+
+
+login_failures_by_ip = AttemptLimiter('login-ip', 'AUTH_LOGIN_FAILURES_PER_IP')
+login_failures_by_username = AttemptLimiter('login-username', 'AUTH_LOGIN_FAILURES_PER_USERNAME')
+registrations_by_ip = AttemptLimiter('register-ip', 'AUTH_REGISTRATIONS_PER_IP')
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from blog_project.metrics import TOKEN_CACHE_HIT, TOKEN_CACHE_MISS
+
+
+class TokenCache:
+    """Bounded LRU cache of token -> user with a per-entry TTL.
+
+    Each worker process keeps its own copy, so the TTL bounds how long a token
+    revoked in another process can keep working here.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                TOKEN_CACHE_MISS.inc()
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            TOKEN_CACHE_HIT.inc()
+            return entry[0]
+
+    def set(self, key, user, ttl=None):
+        """Store ``user``; ``ttl`` can only shorten the cache-wide TTL (e.g. for a token about to expire)."""
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (user, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for key in [k for k, (user, _) in self._data.items() if user.pk == user_id]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
+
+
+token_cache = TokenCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+)